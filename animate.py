@@ -0,0 +1,188 @@
+"""Animated charts: values changing over a sequence of steps.
+
+render_animation builds a chart's artists once and then, frame by frame,
+moves the wedges or bars between the sizes of consecutive steps, e.g. the
+monthly shares of a rose chart. Every frame is drawn into the same figure
+and handed straight to a streaming encoder, so memory stays flat however
+many frames there are:
+
+    render_animation({'type': 'rose', 'title': 'Sales', 'labels': regions},
+                     monthly_totals, 'sales.gif', titles=month_names)
+
+GIFs are written with Pillow (which matplotlib already needs); MP4 needs
+the ffmpeg executable on the PATH.
+"""
+import io
+import os
+import shutil
+import struct
+import subprocess
+
+import numpy as np
+from PIL import Image
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from instrument import count, span
+from render import FIGSIZE, ChartFigure, normalize_spec
+
+ANIMATION_FORMATS = ('gif', 'mp4')
+
+# Frames are screen-sized, like the GUI preview (7in x 80dpi = 560px)
+ANIMATION_DPI = 80
+
+
+class GifWriter:
+    """Writes an animated GIF one frame at a time.
+
+    Pillow only encodes whole GIFs, so each frame is encoded as a one-frame
+    GIF (quantized to its own 256-color palette) and its image block is
+    copied into the output with that palette as a local color table.
+    """
+
+    def __init__(self, path, fps):
+        self.f = open(path, 'wb')
+        # GIF delays are in hundredths of a second; browsers clamp below 2
+        self.delay = max(2, round(100 / fps))
+        self._started = False
+
+    def write(self, rgba):
+        image = Image.fromarray(rgba[..., :3]).quantize(256, method=Image.Quantize.FASTOCTREE)
+        buf = io.BytesIO()
+        image.save(buf, format='GIF')
+        data = buf.getvalue()
+
+        width, height, packed = struct.unpack_from('<HHB', data, 6)
+        pos = 13
+        table = b''
+        if packed & 0x80:
+            size = 3 << ((packed & 0x07) + 1)
+            table = data[pos:pos + size]
+            pos += size
+        while data[pos] == 0x21:  # skip extensions: introducer, label, sub-blocks
+            pos += 2
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+        descriptor = bytearray(data[pos:pos + 10])
+        if table:
+            descriptor[9] = (descriptor[9] & 0x40) | 0x80 | (packed & 0x07)
+
+        if not self._started:
+            self._started = True
+            self.f.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0, 0, 0))
+            # Loop forever
+            self.f.write(b'!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+        # Graphic control extension: replace the previous frame, fixed delay
+        self.f.write(b'!\xf9\x04' + struct.pack('<BHB', 1 << 2, self.delay, 0) + b'\x00')
+        # Descriptor, palette, then the LZW data up to (not including) the trailer
+        self.f.write(bytes(descriptor) + table + data[pos + 10:-1])
+
+    def close(self):
+        self.f.write(b';')
+        self.f.close()
+
+
+class FFmpegWriter:
+    """Pipes raw RGBA frames into an ffmpeg process that encodes H.264"""
+
+    def __init__(self, path, fps, width, height):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError("MP4 export requires ffmpeg on the PATH (e.g. brew install ffmpeg)")
+        self.proc = subprocess.Popen([
+            ffmpeg, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            # yuv420p, which every player supports, needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', '-c:v', 'libx264',
+            path,
+        ], stdin=subprocess.PIPE)
+
+    def write(self, rgba):
+        self.proc.stdin.write(memoryview(np.ascontiguousarray(rgba)))
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed with exit code {self.proc.returncode}")
+
+
+def keyframes(spec, steps):
+    """Normalize spec once per step; every step must keep the same categories"""
+    if len(steps) < 2:
+        raise ValueError("An animation needs at least two steps")
+    specs = [normalize_spec(dict(spec, sizes=sizes)) for sizes in steps]
+    if any(s['labels'] != specs[0]['labels'] for s in specs):
+        raise ValueError("Every step must have the same categories")
+    return specs
+
+
+def tween(a, b, frames, shares):
+    """frames arrays of sizes easing from a to b (b itself excluded).
+
+    With shares set the sizes are interpolated as fractions of the total,
+    so pie wedge angles move linearly; otherwise (bar heights) as is.
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    if shares:
+        a, b = a / a.sum(), b / b.sum()
+    t = np.arange(frames)[:, None] / frames
+    t = t * t * (3 - 2 * t)  # ease in and out
+    return a + (b - a) * t
+
+
+def render_animation(spec, steps, path, fps=20, step_seconds=0.5, titles=None, dpi=ANIMATION_DPI):
+    """Write an animation of spec's chart moving through steps (a list of sizes).
+
+    The format (gif or mp4) comes from path's extension. Each step lasts
+    step_seconds; titles optionally gives one title per step. Returns the
+    number of frames written.
+    """
+    fmt = os.path.splitext(path)[1][1:].lower()
+    if fmt not in ANIMATION_FORMATS:
+        raise ValueError(f"Animations can be saved as {' or '.join(ANIMATION_FORMATS)}, not '{fmt}'")
+    steps_specs = keyframes(spec, steps)
+    if titles is not None:
+        if len(titles) != len(steps):
+            raise ValueError("Give one title per step")
+        for step_spec, title in zip(steps_specs, titles):
+            step_spec['title'] = str(title)
+
+    first = steps_specs[0]
+    frames_per_step = max(1, round(fps * step_seconds))
+    shares = first['type'] in ('pie', 'donut')
+    scale = None
+    if not shares:
+        # One radial scale and label ring for every frame, so bars visibly
+        # grow and shrink under fixed labels. The largest value of each bar
+        # over all steps leaves room for every frame: tweened bars never
+        # outgrow the steps around them
+        scale = np.max([s['sizes'] for s in steps_specs], axis=0)
+
+    fig = Figure(figsize=FIGSIZE, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    chart = ChartFigure(first['type'], len(first['labels']), fig)
+    # Lay out for the first step only: fixed margins keep the frames steady
+    chart.update(first, scale=scale)
+    width, height = canvas.get_width_height()
+
+    frames = 0
+    with span('animation', chart_type=first['type'], format=fmt):
+        writer = GifWriter(path, fps) if fmt == 'gif' else FFmpegWriter(path, fps, width, height)
+        try:
+            for a, b in zip(steps_specs, steps_specs[1:]):
+                for sizes in tween(a['sizes'], b['sizes'], frames_per_step, shares):
+                    chart.update(dict(a, sizes=sizes), layout=False, scale=scale)
+                    canvas.draw()
+                    writer.write(np.asarray(canvas.buffer_rgba()))
+                    frames += 1
+            # Finish on the last step exactly
+            chart.update(steps_specs[-1], layout=False, scale=scale)
+            canvas.draw()
+            writer.write(np.asarray(canvas.buffer_rgba()))
+            frames += 1
+        finally:
+            writer.close()
+    count('frames', frames, chart_type=first['type'], format=fmt)
+    return frames
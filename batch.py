@@ -0,0 +1,228 @@
+"""Batch-render chart specs from a JSON or CSV manifest without the GUI.
+
+Usage:
+    python batch.py manifest.json -o charts/
+    python batch.py manifest.csv -o charts/ --workers 0
+
+--workers spreads the manifest over a process pool (0 = one per CPU).
+--cache-dir keeps rendered charts on disk so identical specs, in this
+manifest or later ones, are only rendered once. --log-timings logs the
+duration of every render stage to stderr as JSON lines (see instrument.py).
+--sheet NAME draws the whole manifest as one small-multiples image instead
+(see sheet.py). A sheet is drawn in one process and is not cached, so
+--workers and --cache-dir cannot be combined with it; if any spec is
+invalid, each bad spec is reported and no sheet is written.
+
+A JSON manifest is a list of chart specs (see render.normalize_spec).
+A CSV manifest has one spec per row with the columns type, title, labels,
+sizes and optionally show_title, show_labels, show_percentages, dpi,
+format, renderer, palette, top_k, min_pct and output; labels and sizes are comma-separated
+inside the cell.
+Each spec may set "output" to choose its file name.
+
+Instead of labels and sizes, a JSON spec may point at a data file to
+aggregate (see datasource.aggregate_file):
+    {"type": "pie", "title": "Sales", "data": {"path": "events.csv",
+     "label_column": "region", "value_column": "amount"}}
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+
+from cache import RenderCache
+from datasource import aggregate_file
+from instrument import LogSink, add_sink
+from render import RENDERERS, VECTOR_FORMATS, FigurePool, init_worker, normalize_spec, render_chart
+from sheet import render_sheet
+
+BOOL_COLUMNS = ('show_title', 'show_labels', 'show_percentages')
+
+# Each process (the CLI itself or a pool worker) reuses its own figures
+_figure_pool = FigurePool()
+_cache = None
+
+
+def _parse_bool(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'on')
+
+
+def load_manifest(path):
+    """Read a list of chart specs from a .json or .csv manifest"""
+    if path.lower().endswith('.csv'):
+        specs = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                spec = {k: v for k, v in row.items() if v not in (None, '')}
+                for key in BOOL_COLUMNS:
+                    if key in spec:
+                        spec[key] = _parse_bool(spec[key])
+                specs.append(spec)
+        return specs
+
+    with open(path) as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError("JSON manifest must be a list of chart specs")
+    return specs
+
+
+def output_name(index, spec):
+    """File name for the index-th spec of a manifest"""
+    if spec.get('output'):
+        return spec['output']
+    return f"{index:05d}_{spec.get('type', 'pie')}.{spec.get('format', 'png')}"
+
+
+def _set_cache_dir(cache_dir):
+    global _cache
+    _cache = RenderCache(disk_dir=cache_dir) if cache_dir else None
+
+
+def _log_timings():
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(message)s')
+    add_sink(LogSink())
+
+
+def _init_worker(cache_dir=None, log_timings=False):
+    """Set up matplotlib once per pool worker"""
+    _set_cache_dir(cache_dir)
+    init_worker(_figure_pool)
+    if log_timings:
+        _log_timings()
+
+
+def resolve_data(spec):
+    """Replace a spec's "data" source with the aggregated labels and sizes"""
+    if 'data' not in spec:
+        return spec
+    labels, sizes = aggregate_file(**spec['data'])
+    spec = {k: v for k, v in spec.items() if k != 'data'}
+    spec.update(labels=labels, sizes=sizes)
+    return spec
+
+
+def _render_job(job):
+    index, spec, path = job
+    try:
+        spec = resolve_data(spec)
+        if _cache is not None:
+            data = _cache.render(spec, pool=_figure_pool)
+        else:
+            data = render_chart(spec, pool=_figure_pool)
+        with open(path, 'wb') as f:
+            f.write(data)
+    except Exception as e:
+        return index, path, e
+    return index, path, None
+
+
+def render_manifest(specs, out_dir, workers=1, cache_dir=None, log_timings=False):
+    """Render every spec into out_dir, yielding (index, path, error) per spec.
+
+    With workers > 1 the specs are rendered in a process pool; results are
+    still yielded in manifest order as soon as they are available. With
+    cache_dir set, renders go through an on-disk RenderCache there. With
+    log_timings set, every process logs its render stage timings.
+    """
+    jobs = ((index, spec, os.path.join(out_dir, output_name(index, spec)))
+            for index, spec in enumerate(specs))
+
+    if workers <= 1:
+        _set_cache_dir(cache_dir)
+        if log_timings:
+            _log_timings()
+        for job in jobs:
+            yield _render_job(job)
+        return
+
+    # Small chunks keep ordered streaming responsive, larger ones cut IPC
+    chunksize = max(1, min(32, len(specs) // (workers * 8)))
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(cache_dir, log_timings)) as pool:
+        yield from pool.imap(_render_job, jobs, chunksize=chunksize)
+
+
+def _render_sheet(specs, path, columns, log_timings):
+    """--sheet mode: every spec is checked first, so bad ones are reported
+    one by one like in a normal batch; returns the exit code
+    """
+    if log_timings:
+        _log_timings()
+    resolved = []
+    failures = 0
+    for index, spec in enumerate(specs):
+        try:
+            resolved.append(normalize_spec(resolve_data(spec)))
+        except Exception as e:
+            failures += 1
+            print(f"[{index}] FAILED: {e}", file=sys.stderr)
+    if failures:
+        print(f"{failures}/{len(specs)} charts failed; {path} was not written", file=sys.stderr)
+        return 1
+
+    fmt = os.path.splitext(path)[1][1:].lower() or 'png'
+    try:
+        data = render_sheet(resolved, columns, fmt=fmt)
+    except ValueError as e:
+        print(f"FAILED {path}: {e}", file=sys.stderr)
+        return 1
+    with open(path, 'wb') as f:
+        f.write(data)
+    print(f"Rendered {len(specs)} charts into {path}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render charts from a JSON/CSV manifest.")
+    parser.add_argument('manifest', help="path to a .json or .csv manifest")
+    parser.add_argument('-o', '--out-dir', default='.', help="directory for rendered charts")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="number of render processes (0 = one per CPU)")
+    parser.add_argument('--cache-dir', help="reuse rendered charts stored in this directory")
+    parser.add_argument('--log-timings', action='store_true',
+                        help="log per-stage render timings to stderr as JSON lines")
+    parser.add_argument('--top-k', type=int,
+                        help="fold all but the K largest categories into 'Other' (unless a spec sets top_k)")
+    parser.add_argument('--min-pct', type=float,
+                        help="fold categories below this percentage into 'Other' (unless a spec sets min_pct)")
+    parser.add_argument('--renderer', choices=RENDERERS,
+                        help="renderer for SVG/PDF specs that do not set one; 'direct' skips matplotlib")
+    parser.add_argument('--sheet', metavar='NAME',
+                        help="render every chart into one sheet image NAME (format from its extension)")
+    parser.add_argument('--columns', type=int, help="charts per row of the --sheet (default: square-ish)")
+    args = parser.parse_args(argv)
+    if args.sheet and (args.workers != 1 or args.cache_dir):
+        parser.error("--workers and --cache-dir do not apply to --sheet")
+    workers = args.workers or os.cpu_count() or 1
+
+    specs = load_manifest(args.manifest)
+    for key, value in (('top_k', args.top_k), ('min_pct', args.min_pct)):
+        if value is not None:
+            specs = [spec if key in spec else dict(spec, **{key: value}) for spec in specs]
+    if args.renderer:
+        # Raster specs keep going through matplotlib
+        specs = [dict(spec, renderer=args.renderer)
+                 if 'renderer' not in spec and spec.get('format') in VECTOR_FORMATS else spec
+                 for spec in specs]
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    if args.sheet:
+        return _render_sheet(specs, os.path.join(args.out_dir, args.sheet), args.columns,
+                             args.log_timings)
+
+    failures = 0
+    for index, path, error in render_manifest(specs, args.out_dir, workers, args.cache_dir,
+                                              args.log_timings):
+        if error is not None:
+            failures += 1
+            print(f"[{index}] FAILED {path}: {error}", file=sys.stderr)
+    print(f"Rendered {len(specs) - failures}/{len(specs)} charts into {args.out_dir}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Frames/sec and peak memory of animation export for growing frame counts.
+
+Memory should stay flat: peak RSS after the longest animation should be
+about the same as after the shortest.
+
+Usage:
+    python benchmarks/bench_animation.py --steps 6 60 --format gif
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from animate import render_animation  # noqa: E402
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', nargs='+', type=int, default=[6, 60],
+                        help="number of steps per animation, shortest first")
+    parser.add_argument('--type', default='rose')
+    parser.add_argument('--categories', type=int, default=8)
+    parser.add_argument('--format', default='gif', choices=('gif', 'mp4'))
+    parser.add_argument('--fps', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    spec = {'type': args.type, 'title': 'Monthly shares',
+            'labels': [f'Region {i}' for i in range(args.categories)]}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f'animation.{args.format}')
+        for steps in args.steps:
+            sizes = rng.uniform(5, 50, (steps, args.categories)).tolist()
+            start = time.perf_counter()
+            frames = render_animation(spec, sizes, path, fps=args.fps)
+            elapsed = time.perf_counter() - start
+            print(f"{frames:6d} frames: {frames / elapsed:6.1f} frames/sec, "
+                  f"{os.path.getsize(path) / 1024:8.0f} KiB, peak RSS {peak_rss_mb():6.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compare charts/sec with a fresh figure per chart vs. a FigurePool.
+
+Usage:
+    python benchmarks/bench_figure_pool.py --charts 50 --categories 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import CHART_TYPES, FigurePool, render_chart  # noqa: E402
+
+
+def make_specs(count, categories, seed=0):
+    rnd = random.Random(seed)
+    labels = [f'Category {i}' for i in range(categories)]
+    return [{
+        'type': chart_type,
+        'title': f'{chart_type} #{i}',
+        'labels': labels,
+        'sizes': [rnd.uniform(1, 100) for _ in labels],
+    } for i in range(count) for chart_type in CHART_TYPES]
+
+
+def run(specs, pool):
+    start = time.perf_counter()
+    for spec in specs:
+        render_chart(spec, pool=pool)
+    return len(specs) / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--charts', type=int, default=25, help="charts per chart type")
+    parser.add_argument('--categories', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    specs = make_specs(args.charts, args.categories)
+    # Warm up font caches so neither side pays for them
+    render_chart(specs[0])
+
+    fresh = run(specs, None)
+    pooled = run(specs, FigurePool())
+    print(f"{len(specs)} charts, {args.categories} categories each")
+    print(f"  fresh figure per chart: {fresh:7.2f} charts/sec")
+    print(f"  FigurePool:             {pooled:7.2f} charts/sec  ({pooled / fresh:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
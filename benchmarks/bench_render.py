@@ -0,0 +1,193 @@
+"""Benchmark chart rendering per chart type, split into phases.
+
+Every chart type is rendered over a matrix of category counts, show-flag
+combinations and DPIs. For each case the wall time is split into:
+
+    figure       new_figure()
+    artists      ChartFigure(): wedges/bars and their text objects
+    text_layout  ChartFigure.update() minus tight_layout: geometry, label
+                 placement and the collision pass for big charts
+    tight_layout Figure.tight_layout() inside update()
+    encode       savefig into PNG (or --format) bytes
+
+Each case runs in a fresh child process, so its peak RSS is its own (the
+baseline of an interpreter with matplotlib loaded included). 'artists'
+counts every artist in the figure; ChartFigure builds all texts and hides
+the ones a spec turns off, so 'drawn' counts only the visible ones. Results are
+printed as a table and can be saved as JSON and compared with an earlier
+run to spot regressions between commits.
+
+Usage:
+    python benchmarks/bench_render.py --json before.json
+    python benchmarks/bench_render.py --counts 5 50 --dpis 150 --compare before.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import matplotlib  # noqa: E402
+import numpy as np  # noqa: E402
+
+from render import CHART_TYPES, ChartFigure, encode_figure, new_figure, render_chart  # noqa: E402
+
+PHASES = ('figure', 'artists', 'text_layout', 'tight_layout', 'encode')
+FLAGS = ((True, True), (True, False), (False, True), (False, False))
+
+
+def make_spec(chart_type, n, show_labels, show_percentages, seed=0):
+    """A chart with n categories of long-tailed random sizes"""
+    rng = np.random.default_rng(seed)
+    return {
+        'type': chart_type,
+        'title': f'{chart_type} with {n} categories',
+        'labels': [f'Category {i}' for i in range(n)],
+        'sizes': rng.lognormal(3, 1, n).tolist(),
+        'show_labels': show_labels,
+        'show_percentages': show_percentages,
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def render_phases(spec, dpi, fmt):
+    """Render spec once; returns ({phase: seconds}, figure, encoded bytes)"""
+    t0 = time.perf_counter()
+    fig = new_figure()
+    t1 = time.perf_counter()
+    chart = ChartFigure(spec['type'], len(spec['labels']), fig)
+    t2 = time.perf_counter()
+
+    tight = []
+    tight_layout = fig.tight_layout
+
+    def timed_tight_layout(*args, **kwargs):
+        start = time.perf_counter()
+        tight_layout(*args, **kwargs)
+        tight.append(time.perf_counter() - start)
+    fig.tight_layout = timed_tight_layout
+
+    chart.update(spec)
+    t3 = time.perf_counter()
+    data = encode_figure(fig, fmt, dpi)
+    t4 = time.perf_counter()
+    return {
+        'figure': t1 - t0,
+        'artists': t2 - t1,
+        'text_layout': t3 - t2 - sum(tight),
+        'tight_layout': sum(tight),
+        'encode': t4 - t3,
+    }, fig, data
+
+
+def measure(case, repeat, fmt):
+    """Run one case (in a child process) and return its result dict"""
+    from render import normalize_spec
+    spec = normalize_spec(make_spec(case['type'], case['categories'],
+                                    case['show_labels'], case['show_percentages']))
+    runs = []
+    for _ in range(repeat):
+        phases, fig, data = render_phases(spec, case['dpi'], fmt)
+        runs.append(phases)
+    phases = {phase: statistics.median(run[phase] for run in runs) for phase in PHASES}
+    artists = fig.findobj()
+    return dict(case, phases=phases, total=sum(phases.values()), peak_rss_mb=peak_rss_mb(),
+                artists=len(artists), drawn=sum(a.get_visible() for a in artists),
+                bytes=len(data))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(r):
+        return (r['type'], r['categories'], r['show_labels'], r['show_percentages'], r['dpi'])
+    old = {key(r): r for r in baseline['results']}
+    print(f"\nCompared with {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for r in results:
+        before = old.get(key(r))
+        if before is None:
+            continue
+        ratio = r['total'] / before['total']
+        flag = '  <-- slower' if ratio > 1.1 else ''
+        print(f"  {r['type']:<7}{r['categories']:>6}  labels={r['show_labels']:d} "
+              f"pct={r['show_percentages']:d} dpi={r['dpi']:<4g} "
+              f"{before['total'] * 1000:9.1f}ms -> {r['total'] * 1000:9.1f}ms  ({ratio:.2f}x){flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--types', nargs='+', default=list(CHART_TYPES), choices=CHART_TYPES)
+    parser.add_argument('--counts', nargs='+', type=int, default=[5, 50, 500, 5000],
+                        help="category counts to render")
+    parser.add_argument('--dpis', nargs='+', type=float, default=[72, 150, 300])
+    parser.add_argument('--format', default='png')
+    parser.add_argument('--repeat', type=int, default=3, help="renders per case (median is kept)")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    # Pay font cache and first-draw costs once, before the children fork
+    render_chart(make_spec('pie', 5, True, True))
+
+    cases = [{'type': chart_type, 'categories': n, 'show_labels': labels,
+              'show_percentages': pct, 'dpi': dpi}
+             for chart_type, n, (labels, pct), dpi
+             in itertools.product(args.types, args.counts, FLAGS, args.dpis)]
+
+    # A fresh process per case keeps peak RSS per case; fork (where there is
+    # one) also lets the children inherit the warmed-up caches
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    results = []
+    header = f"{'type':<7}{'n':>6} lbl pct  dpi " + ''.join(f"{p:>13}" for p in PHASES)
+    print(header + f"{'total':>10}{'RSS MB':>8}{'artists':>9}{'drawn':>7}")
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for case in cases:
+            r = pool.apply(measure, (case, args.repeat, args.format))
+            results.append(r)
+            print(f"{r['type']:<7}{r['categories']:>6}   {r['show_labels']:d}   {r['show_percentages']:d} "
+                  f"{r['dpi']:>4.0f} " + ''.join(f"{r['phases'][p] * 1000:11.1f}ms" for p in PHASES)
+                  + f"{r['total'] * 1000:8.1f}ms{r['peak_rss_mb']:8.1f}{r['artists']:>9}{r['drawn']:>7}",
+                  flush=True)
+
+    if args.json:
+        meta = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'matplotlib': matplotlib.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'format': args.format,
+            'repeat': args.repeat,
+        }
+        with open(args.json, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
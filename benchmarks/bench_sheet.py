@@ -0,0 +1,64 @@
+"""Compare one small-multiples sheet with N separate chart exports.
+
+Usage:
+    python benchmarks/bench_sheet.py --charts 20 50 --dpi 72
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import FigurePool, render_chart  # noqa: E402
+from sheet import render_sheet  # noqa: E402
+
+
+def make_specs(count, categories, dpi, seed=0):
+    """count related pies and roses, one per 'region'"""
+    rnd = random.Random(seed)
+    labels = [f'Category {i}' for i in range(categories)]
+    return [{
+        'type': ('pie', 'rose')[i % 2],
+        'title': f'Region {i}',
+        'labels': labels,
+        'sizes': [rnd.uniform(1, 100) for _ in labels],
+        'dpi': dpi,
+    } for i in range(count)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--charts', nargs='+', type=int, default=[20, 50])
+    parser.add_argument('--categories', type=int, default=6)
+    parser.add_argument('--dpi', type=float, default=72)
+    parser.add_argument('--format', default='png')
+    args = parser.parse_args(argv)
+
+    # Warm up font caches so neither side pays for them
+    render_chart({'type': 'pie', 'labels': 'a,b', 'sizes': '1,2'})
+
+    for count in args.charts:
+        specs = make_specs(count, args.categories, args.dpi)
+        separate, images = timed(lambda: [render_chart(dict(spec, format=args.format))
+                                          for spec in specs])
+        pool = FigurePool()
+        pooled, _ = timed(lambda: [render_chart(dict(spec, format=args.format), pool=pool)
+                                   for spec in specs])
+        sheet, data = timed(lambda: render_sheet(specs, fmt=args.format, dpi=args.dpi))
+        print(f"{count} charts, {args.categories} categories, {args.format} at {args.dpi:g} dpi")
+        print(f"  separate exports:     {separate:7.2f}s  {sum(map(len, images)) / 1024:8.0f} KiB")
+        print(f"  separate + FigurePool:{pooled:7.2f}s")
+        print(f"  one sheet:            {sheet:7.2f}s  {len(data) / 1024:8.0f} KiB  "
+              f"({separate / sheet:.2f}x faster than separate exports)")
+
+
+if __name__ == '__main__':
+    main()
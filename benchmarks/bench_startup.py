@@ -0,0 +1,77 @@
+"""Measure Chart Designer startup: time to first window and to first chart.
+
+Launches the app several times with CHART_DESIGNER_STARTUP_TRACE=exit, which
+makes it print its startup milestones and quit after drawing the first
+preview, and reports the median of each. Needs a display.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --app "dist/Chart Designer.app/Contents/MacOS/Chart Designer" \\
+        --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EVENTS = ('first_window', 'first_chart')
+
+
+def launch(command, timeout):
+    """Run the app once; returns {event: seconds since launch}"""
+    env = dict(os.environ, CHART_DESIGNER_STARTUP_TRACE='exit')
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env, cwd=REPO_ROOT)
+    times = {}
+
+    def read_events():
+        # Lines look like "startup <event> <seconds since the app started>";
+        # the wall clock here also covers interpreter start and unpacking
+        for line in proc.stdout:
+            parts = line.split()
+            if len(parts) == 3 and parts[0] == 'startup' and parts[1] in EVENTS:
+                times[parts[1]] = time.perf_counter() - start
+
+    reader = threading.Thread(target=read_events, daemon=True)
+    reader.start()
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    reader.join(timeout=1)
+    missing = [event for event in EVENTS if event not in times]
+    if missing:
+        raise RuntimeError(f"App did not report {', '.join(missing)} within {timeout:.0f}s")
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--app', help="frozen executable to launch (default: graph.py from source)")
+    parser.add_argument('--timeout', type=float, default=60., help="seconds to wait per launch")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    command = [args.app] if args.app else [sys.executable, os.path.join(REPO_ROOT, 'graph.py')]
+    runs = [launch(command, args.timeout) for _ in range(args.runs)]
+    medians = {event: statistics.median(run[event] for run in runs) for event in EVENTS}
+
+    print(f"{args.runs} launches of {' '.join(command)}")
+    for event in EVENTS:
+        print(f"  {event:<13} median {medians[event]:6.3f}s  "
+              f"(min {min(run[event] for run in runs):.3f}s, max {max(run[event] for run in runs):.3f}s)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'command': command, 'runs': runs, 'median': medians}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Compare a multi-target export with one render_chart call per size.
+
+Also shows what the PNG compress_level and colors options do to encode
+time and file size at a print-sized resolution.
+
+Usage:
+    python benchmarks/bench_targets.py --categories 12 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import CHART_TYPES, ChartFigure, FigurePool, normalize_spec, render_chart  # noqa: E402
+from targets import (PRESETS, encode_raster, normalize_target, rasterize,  # noqa: E402
+                     render_targets, tight_bbox)
+
+PNG_OPTIONS = ({}, {'compress_level': 1}, {'compress_level': 9}, {'colors': 64},
+               {'colors': 64, 'compress_level': 9})
+
+
+def make_spec(chart_type, categories, seed=0):
+    rnd = random.Random(seed)
+    labels = [f'Category {i}' for i in range(categories)]
+    return {'type': chart_type, 'title': f'{chart_type} chart', 'labels': labels,
+            'sizes': [rnd.uniform(1, 100) for _ in labels]}
+
+
+def median_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def separate_exports(spec, targets, pool):
+    """What exporting every size took before: a full render per target"""
+    for target in map(normalize_target, targets):
+        if target['width'] is not None:
+            # Close enough for timing; render_chart has no width option
+            target['dpi'] = target['width'] / 7
+        render_chart(dict(spec, format=target['format'], dpi=target['dpi']), pool=pool)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--types', nargs='+', default=list(CHART_TYPES), choices=CHART_TYPES)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--targets', nargs='+', default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument('--repeat', type=int, default=3, help="runs per measurement (median is kept)")
+    parser.add_argument('--dpi', type=float, default=300, help="resolution for the PNG option table")
+    args = parser.parse_args(argv)
+
+    # Warm up font caches so neither side pays for them
+    render_chart({'type': 'pie', 'labels': 'a,b', 'sizes': '1,2'})
+
+    pool = FigurePool()
+    print(f"Targets: {', '.join(args.targets)}")
+    for chart_type in args.types:
+        spec = make_spec(chart_type, args.categories)
+        separate = median_time(lambda: separate_exports(spec, args.targets, pool), args.repeat)
+        serial = median_time(lambda: render_targets(spec, args.targets, pool=pool, workers=1),
+                             args.repeat)
+        multi = median_time(lambda: render_targets(spec, args.targets, pool=pool), args.repeat)
+        print(f"  {chart_type:<7} separate {separate * 1000:7.0f}ms   one layout {serial * 1000:7.0f}ms"
+              f"   + parallel encode {multi * 1000:7.0f}ms   ({separate / multi:.2f}x)")
+
+    spec = normalize_spec(make_spec('pie', args.categories))
+    chart = ChartFigure('pie', args.categories)
+    chart.update(spec)
+    rgba = rasterize(chart.fig, tight_bbox(chart.fig), args.dpi)
+    print(f"\nPNG options at {args.dpi:g} dpi ({rgba.shape[1]}x{rgba.shape[0]}):")
+    for options in PNG_OPTIONS:
+        target = normalize_target(dict(options, format='png'))
+        data = encode_raster(rgba, target, args.dpi)
+        seconds = median_time(lambda: encode_raster(rgba, target, args.dpi), args.repeat)
+        label = ', '.join(f'{k}={v}' for k, v in options.items()) or 'defaults'
+        print(f"  {label:<30}{seconds * 1000:7.0f}ms  {len(data) / 1024:7.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
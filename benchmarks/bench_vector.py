@@ -0,0 +1,44 @@
+"""Compare SVG/PDF exports through matplotlib vs. the direct vector renderer.
+
+Usage:
+    python benchmarks/bench_vector.py --charts 25 --categories 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from render import render_chart  # noqa: E402
+from bench_figure_pool import make_specs  # noqa: E402
+
+
+def run(specs):
+    """(charts/sec, average bytes per chart)"""
+    start = time.perf_counter()
+    total = sum(len(render_chart(spec)) for spec in specs)
+    return len(specs) / (time.perf_counter() - start), total / len(specs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--charts', type=int, default=25, help="charts per chart type")
+    parser.add_argument('--categories', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    specs = make_specs(args.charts, args.categories)
+    # Warm up font caches so the matplotlib side does not pay for them
+    render_chart(specs[0])
+
+    print(f"{len(specs)} charts, {args.categories} categories each")
+    for fmt in ('svg', 'pdf'):
+        slow, slow_bytes = run([dict(spec, format=fmt) for spec in specs])
+        fast, fast_bytes = run([dict(spec, format=fmt, renderer='direct') for spec in specs])
+        print(f"  {fmt} matplotlib: {slow:8.2f} charts/sec  {slow_bytes / 1024:6.1f} KiB/chart")
+        print(f"  {fmt} direct:     {fast:8.2f} charts/sec  {fast_bytes / 1024:6.1f} KiB/chart  "
+              f"({fast / slow:.1f}x faster, {slow_bytes / fast_bytes:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Load-test the HTTP render service with concurrent clients.
+
+Each client thread posts chart specs to /render back to back for the given
+duration. A --duplicates share of the requests reuse a handful of popular
+specs (which the server coalesces while they are in flight); the rest are
+unique. Reports latency percentiles, throughput and the status codes seen,
+plus the server's own /stats.
+
+Usage:
+    python server.py --workers 4 &
+    python benchmarks/load_server.py --clients 16 --seconds 20
+    python benchmarks/load_server.py --start-server --workers 4 --json load.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np  # noqa: E402
+
+from render import CHART_TYPES  # noqa: E402
+from server import percentile  # noqa: E402
+
+POPULAR_SPECS = 8
+
+
+def make_spec(rng, unique_id, fmt):
+    chart_type = CHART_TYPES[unique_id % len(CHART_TYPES)]
+    n = int(rng.integers(3, 25))
+    return {
+        'type': chart_type,
+        'title': f'Load test {unique_id}',
+        'labels': [f'Item {i}' for i in range(n)],
+        'sizes': np.round(rng.lognormal(3, 1, n), 2).tolist(),
+        'format': fmt,
+    }
+
+
+def post(url, body, timeout):
+    """POST a spec; returns (status, Retry-After seconds or None)"""
+    request = urllib.request.Request(url + '/render', data=body,
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status, None
+    except urllib.error.HTTPError as e:
+        e.read()
+        retry = e.headers.get('Retry-After')
+        return e.code, float(retry) if retry else None
+    except OSError:
+        return 'error', None
+
+
+def client(url, seconds, duplicates, fmt, seed, results, timeout):
+    rng = np.random.default_rng(seed)
+    popular = [json.dumps(make_spec(np.random.default_rng(i), i, fmt)).encode()
+               for i in range(POPULAR_SPECS)]
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        if rng.random() < duplicates:
+            body = popular[int(rng.integers(POPULAR_SPECS))]
+        else:
+            body = json.dumps(make_spec(rng, seed * 1000003 + n, fmt)).encode()
+        n += 1
+        start = time.perf_counter()
+        status, retry_after = post(url, body, timeout)
+        results.append((status, time.perf_counter() - start))
+        if retry_after:
+            # Back off like a well-behaved caller
+            time.sleep(min(retry_after, max(0., deadline - time.perf_counter())))
+
+
+def wait_until_up(url, timeout=30.):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/health', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout:.0f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10.)
+    parser.add_argument('--duplicates', type=float, default=0.3,
+                        help="share of requests for a few popular specs (0-1)")
+    parser.add_argument('--format', default='png', choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--timeout', type=float, default=60.)
+    parser.add_argument('--start-server', action='store_true',
+                        help="run server.py on --url's port for the duration of the test")
+    parser.add_argument('--workers', type=int, default=0, help="with --start-server")
+    parser.add_argument('--max-pending', type=int, default=64, help="with --start-server")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args(argv)
+    url = args.url.rstrip('/')
+
+    server = None
+    if args.start_server:
+        port = url.rsplit(':', 1)[1]
+        server = subprocess.Popen([sys.executable, os.path.join(REPO_ROOT, 'server.py'),
+                                   '--port', port, '--workers', str(args.workers),
+                                   '--max-pending', str(args.max_pending)])
+    try:
+        wait_until_up(url)
+        results = []
+        threads = [threading.Thread(target=client, args=(url, args.seconds, args.duplicates,
+                                                         args.format, seed, results, args.timeout))
+                   for seed in range(args.clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        with urllib.request.urlopen(url + '/stats') as response:
+            server_stats = json.load(response)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(seconds for status, seconds in results if status == 200)
+    summary = {
+        'clients': args.clients,
+        'seconds': round(elapsed, 2),
+        'requests': len(results),
+        'ok': statuses.get(200, 0),
+        'statuses': {str(k): v for k, v in sorted(statuses.items(), key=str)},
+        'throughput_per_second': round(statuses.get(200, 0) / elapsed, 2),
+    }
+    for pct in (50, 90, 99):
+        value = percentile(latencies, pct)
+        summary[f'p{pct}_ms'] = None if value is None else round(value * 1000, 2)
+
+    print(f"{summary['requests']} requests from {args.clients} clients in {elapsed:.1f}s: "
+          f"{summary['throughput_per_second']:.1f} ok/s")
+    print(f"latency p50 {summary['p50_ms']} ms, p90 {summary['p90_ms']} ms, p99 {summary['p99_ms']} ms")
+    print("status codes: " + ', '.join(f"{k}: {v}" for k, v in summary['statuses'].items()))
+    print(f"server: {server_stats['rendered']} rendered, {server_stats['coalesced']} coalesced, "
+          f"{server_stats['rejected']} rejected, {server_stats['errors']} errors")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'client': summary, 'server': server_stats}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
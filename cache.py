@@ -0,0 +1,164 @@
+"""Content-addressed cache for rendered charts.
+
+Charts are keyed by a hash of their normalized spec, so two requests for the
+same chart (title, labels, values, colors, show flags, dpi, format) share one
+entry no matter how the spec was written. Hits are served from an in-memory
+LRU tier or, optionally, an on-disk tier, without touching matplotlib.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+import matplotlib
+
+from render import normalize_spec, render_chart
+
+# Bump when a change to render.py alters the pixels for an unchanged spec
+CACHE_VERSION = 2
+
+
+def spec_key(spec):
+    """Stable hex digest identifying the image a spec renders to"""
+    spec = normalize_spec(spec)
+    spec['custom_colors'] = {str(k): _color_key(v) for k, v in spec['custom_colors'].items()}
+    payload = json.dumps([CACHE_VERSION, matplotlib.__version__, spec],
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _color_key(color):
+    if isinstance(color, str):
+        return color.lower()
+    return [round(float(c), 6) for c in color]
+
+
+class RenderCache:
+    """Two-tier LRU cache of rendered chart bytes.
+
+    max_bytes bounds the in-memory tier. With disk_dir set, rendered charts
+    are also written there and the least recently used files are deleted
+    once the directory holds more than max_disk_bytes. The disk index is
+    per instance, so processes sharing a directory only evict what they
+    have seen.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None,
+                 max_disk_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0,
+                      'evictions': 0, 'disk_evictions': 0}
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _scan_disk(self):
+        entries = []
+        for sub in os.listdir(self.disk_dir):
+            subdir = os.path.join(self.disk_dir, sub)
+            if not os.path.isdir(subdir):
+                continue
+            for name in os.listdir(subdir):
+                if name.startswith('.'):
+                    continue  # an unfinished write
+                st = os.stat(os.path.join(subdir, name))
+                entries.append((st.st_mtime, name, st.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def get(self, spec):
+        """Return the cached bytes for spec, or None"""
+        return self._lookup(spec_key(spec))
+
+    def _lookup(self, key):
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.stats['hits'] += 1
+            return data
+
+        if key in self._disk:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                # Deleted behind our back (another process or a manual clean)
+                self._disk_bytes -= self._disk.pop(key)
+            else:
+                self._disk.move_to_end(key)
+                self.stats['disk_hits'] += 1
+                self._store_memory(key, data)
+                return data
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, spec, data):
+        self._store(spec_key(spec), data)
+
+    def _store(self, key, data):
+        self._store_memory(key, data)
+        if self.disk_dir:
+            self._store_disk(key, data)
+
+    def _store_memory(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats['evictions'] += 1
+
+    def _store_disk(self, key, data):
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial image
+        fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        self._disk_bytes -= self._disk.pop(key, 0)
+        self._disk[key] = len(data)
+        self._disk_bytes += len(data)
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats['disk_evictions'] += 1
+            try:
+                os.remove(self._disk_path(old_key))
+            except OSError:
+                pass
+
+    def render(self, spec, pool=None):
+        """Return the image for spec, rendering and caching it on a miss"""
+        key = spec_key(spec)
+        data = self._lookup(key)
+        if data is None:
+            data = render_chart(spec, pool=pool)
+            self._store(key, data)
+        return data
+
+    def clear(self):
+        """Drop the in-memory tier (the disk tier is left alone)"""
+        self._memory.clear()
+        self._memory_bytes = 0
+
@@ -0,0 +1,207 @@
+"""Aggregate chart data straight from large event files.
+
+Each reader streams its input in chunks and sums the values per label into
+NumPy arrays, so peak memory depends on the chunk size and the number of
+categories, never on the number of rows. The result plugs straight into a
+chart spec:
+
+    labels, sizes = aggregate_file('events.csv', 'region', 'amount')
+    png = render_chart({'type': 'pie', 'labels': labels, 'sizes': sizes})
+
+Labels keep the order in which they first appear in the data.
+"""
+import csv
+import os
+
+import numpy as np
+
+CHUNK_ROWS = 100_000
+
+
+class Aggregator:
+    """Running per-label totals, fed one chunk of rows at a time"""
+
+    def __init__(self):
+        self._index = {}
+        self._totals = np.zeros(64)
+
+    def add(self, labels, values=None):
+        """Add a chunk: labels is an array of keys, values the matching numbers
+
+        Without values every row counts as 1.
+        """
+        labels = np.asarray(labels)
+        if len(labels) == 0:
+            return
+        uniques, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        weights = None if values is None else np.asarray(values, dtype=float)
+        chunk_totals = np.bincount(inverse.ravel(), weights=weights, minlength=len(uniques))
+
+        # Register new labels in order of first appearance, not sorted order
+        ids = np.empty(len(uniques), dtype=np.intp)
+        for u in np.argsort(first, kind='stable'):
+            key = uniques[u]
+            # Object arrays (Arrow strings) already hold Python values
+            key = key.item() if isinstance(key, np.generic) else key
+            i = self._index.get(key)
+            if i is None:
+                i = self._index[key] = len(self._index)
+            ids[u] = i
+
+        if len(self._index) > len(self._totals):
+            grown = np.zeros(max(len(self._index), 2 * len(self._totals)))
+            grown[:len(self._totals)] = self._totals
+            self._totals = grown
+        # ids are unique within a chunk, so plain fancy-index addition is safe
+        self._totals[ids] += chunk_totals
+
+    def result(self):
+        """(labels, totals) with labels as strings and totals as a float array"""
+        labels = [str(k) for k in self._index]
+        return labels, self._totals[:len(labels)].copy()
+
+
+def _column_index(header, column):
+    if isinstance(column, int):
+        return column
+    try:
+        return header.index(column)
+    except ValueError:
+        raise ValueError(f"Column '{column}' not found. Columns: {', '.join(header)}")
+
+
+def _column_name(names, column):
+    """The name of a column given by name or 0-based index"""
+    if isinstance(column, int):
+        if not -len(names) <= column < len(names):
+            raise ValueError(f"Column {column} not found; the file has {len(names)} columns")
+        return names[column]
+    return names[_column_index(names, column)]
+
+
+def aggregate_csv(path, label_column, value_column=None, delimiter=',',
+                  has_header=True, chunk_rows=CHUNK_ROWS):
+    """Sum value_column per label_column over a CSV file, chunk_rows at a time.
+
+    Columns are header names or 0-based indices. Without value_column the
+    rows per label are counted.
+    """
+    agg = Aggregator()
+    with open(path, newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, []) if has_header else []
+        label_idx = _column_index(header, label_column)
+        value_idx = None if value_column is None else _column_index(header, value_column)
+
+        labels, values = [], []
+        for row in reader:
+            if not row:
+                continue
+            try:
+                labels.append(row[label_idx])
+                if value_idx is not None:
+                    values.append(row[value_idx])
+            except IndexError:
+                missing = label_column if not -len(row) <= label_idx < len(row) else value_column
+                raise ValueError(f"Line {reader.line_num} is missing column '{missing}' "
+                                 f"(it has {len(row)})")
+            if len(labels) >= chunk_rows:
+                _add_csv_chunk(agg, labels, values, value_idx, reader.line_num)
+                labels, values = [], []
+        _add_csv_chunk(agg, labels, values, value_idx, reader.line_num)
+    return agg.result()
+
+
+def _add_csv_chunk(agg, labels, values, value_idx, line_num):
+    if value_idx is None:
+        agg.add(labels)
+        return
+    try:
+        numbers = np.asarray(values, dtype=float)
+    except ValueError:
+        raise ValueError(f"Non-numeric value in column {value_idx} "
+                         f"(in the {len(values)} rows before line {line_num})")
+    agg.add(labels, numbers)
+
+
+def aggregate_npy(labels_path, values_path=None, chunk_rows=CHUNK_ROWS):
+    """Sum a .npy value array per entry of a .npy label array.
+
+    Both files are memory-mapped and read chunk_rows at a time. Labels may
+    be integer codes or fixed-width strings (object arrays cannot be mapped).
+    """
+    labels = np.load(labels_path, mmap_mode='r')
+    values = None if values_path is None else np.load(values_path, mmap_mode='r')
+    if values is not None and len(values) != len(labels):
+        raise ValueError(f"Labels and values must have the same length "
+                         f"({len(labels)} vs {len(values)})")
+
+    agg = Aggregator()
+    for start in range(0, len(labels), chunk_rows):
+        stop = start + chunk_rows
+        agg.add(labels[start:stop], None if values is None else values[start:stop])
+    return agg.result()
+
+
+def aggregate_arrow(path, label_column, value_column=None, chunk_rows=CHUNK_ROWS):
+    """Sum value_column per label_column over a Parquet or Arrow IPC file.
+
+    Columns are names or 0-based indices. Record batches of at most
+    chunk_rows rows are read one at a time. Needs the optional pyarrow package.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Arrow/Parquet files requires pyarrow (pip install pyarrow)")
+
+    agg = Aggregator()
+    if path.lower().endswith('.parquet'):
+        parquet = pq.ParquetFile(path)
+        label_column, value_column, columns = _arrow_columns(
+            parquet.schema_arrow.names, label_column, value_column)
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns):
+            _add_arrow_batch(agg, batch, label_column, value_column)
+    else:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            label_column, value_column, _ = _arrow_columns(
+                reader.schema.names, label_column, value_column)
+            for i in range(reader.num_record_batches):
+                # Batches are memory-mapped; slicing them is free
+                batch = reader.get_batch(i)
+                for start in range(0, batch.num_rows, chunk_rows):
+                    _add_arrow_batch(agg, batch.slice(start, chunk_rows), label_column,
+                                     value_column)
+    return agg.result()
+
+
+def _arrow_columns(names, label_column, value_column):
+    """Column names for the label and value columns, and the list to read"""
+    label_column = _column_name(names, label_column)
+    if value_column is None:
+        return label_column, None, [label_column]
+    value_column = _column_name(names, value_column)
+    return label_column, value_column, [label_column, value_column]
+
+
+def _add_arrow_batch(agg, batch, label_column, value_column):
+    labels = batch.column(label_column).to_numpy(zero_copy_only=False)
+    values = None
+    if value_column is not None:
+        values = batch.column(value_column).to_numpy(zero_copy_only=False)
+    agg.add(labels, values)
+
+
+def aggregate_file(path, label_column=0, value_column=None, **kwargs):
+    """Aggregate any supported file, picking the reader by extension.
+
+    For .npy files label_column is unused and value_column, if given, is the
+    path to the matching .npy array of values.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return aggregate_npy(path, value_column, **kwargs)
+    if ext in ('.parquet', '.arrow', '.feather', '.ipc'):
+        return aggregate_arrow(path, label_column, value_column, **kwargs)
+    return aggregate_csv(path, label_column, value_column, **kwargs)
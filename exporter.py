@@ -0,0 +1,128 @@
+"""Background chart export.
+
+ExportQueue renders submitted specs one after another on a worker thread so
+a slow export never blocks the GUI. Finished jobs are handed back through
+poll(), which the GUI calls from its own event loop (root.after), so no
+widget is ever touched from the worker thread.
+"""
+import os
+import queue
+import tempfile
+import threading
+
+from render import FigurePool, render_chart
+from targets import render_targets, target_paths
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class ExportJob:
+    """One requested export: a spec snapshot and the file to write.
+
+    With targets set (see targets.py) the chart is saved once per target,
+    next to path, instead of to path itself.
+    """
+
+    def __init__(self, spec, path, targets=None):
+        self.spec = spec
+        self.path = path
+        self.targets = targets
+        self.status = QUEUED
+        self.error = None
+        self._cancel = threading.Event()
+
+    @property
+    def paths(self):
+        """The files this job writes"""
+        if self.targets is None:
+            return [self.path]
+        return list(target_paths(self.path, self.targets).values())
+
+    def cancel(self):
+        """Ask for the job to be dropped; a running render is discarded"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+
+class ExportQueue:
+    def __init__(self):
+        self._pending = queue.Queue()
+        self._finished = queue.Queue()
+        self._jobs = []
+        self._thread = None
+        # Only the worker thread renders, so it can keep its figures
+        self._figure_pool = FigurePool(max_figures=4)
+
+    def submit(self, spec, path, targets=None):
+        """Queue spec for export to path (or its targets) and return its ExportJob"""
+        job = ExportJob(dict(spec), path, targets)
+        self._jobs.append(job)
+        self._pending.put(job)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name='chart-export', daemon=True)
+            self._thread.start()
+        return job
+
+    def cancel_all(self):
+        for job in self._jobs:
+            job.cancel()
+
+    def active(self):
+        """Jobs that are queued or running, oldest first"""
+        return [job for job in self._jobs if job.status in (QUEUED, RUNNING)]
+
+    def poll(self):
+        """Return the jobs that finished since the last call (non-blocking)"""
+        finished = []
+        while True:
+            try:
+                finished.append(self._finished.get_nowait())
+            except queue.Empty:
+                break
+        for job in finished:
+            self._jobs.remove(job)
+        return finished
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            if not job.cancelled:
+                job.status = RUNNING
+                try:
+                    if job.targets is None:
+                        outputs = {job.path: render_chart(job.spec, pool=self._figure_pool)}
+                    else:
+                        files = render_targets(job.spec, job.targets, pool=self._figure_pool)
+                        paths = target_paths(job.path, job.targets)
+                        outputs = {paths[name]: data for name, data in files.items()}
+                    if not job.cancelled:
+                        for path, data in outputs.items():
+                            _write_atomic(path, data)
+                except Exception as e:
+                    job.error = e
+            if job.error is not None:
+                job.status = FAILED
+            elif job.cancelled:
+                job.status = CANCELLED
+            else:
+                job.status = DONE
+            self._finished.put(job)
+
+
+def _write_atomic(path, data):
+    # Never leave a half-written image behind if something goes wrong
+    fd, tmp = tempfile.mkstemp(prefix='.export-', dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
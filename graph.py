@@ -1,51 +1,76 @@
+import time
+START_TIME = time.perf_counter()
+
 import tkinter as tk
-from tkinter import messagebox, filedialog, Canvas, colorchooser
-import matplotlib
-matplotlib.use('TkAgg')  # Force matplotlib to use TkAgg backend
-import matplotlib.pyplot as plt
-import numpy as np
+from tkinter import messagebox, filedialog, Canvas, colorchooser, ttk
 import sys
 import os
+import threading
+
+# matplotlib and numpy take seconds to import, so the window is built with
+# tkinter alone and the plotting stack loads on a background thread
+# (prewarm_plotting). These are filled in by load_plotting once it is ready.
+render = None
+exporter = None
+palette = None
+live_preview = None
+export_queue = None
+plotting_thread = None
+PLOTTING_POLL_MS = 50
+
+# CHART_DESIGNER_STARTUP_TRACE=1 prints startup milestones to stdout;
+# =exit also closes the app after the first chart (benchmarks/bench_startup.py)
+STARTUP_TRACE = os.environ.get('CHART_DESIGNER_STARTUP_TRACE', '')
+startup_events = set()
+
+def trace_startup(event):
+    """Print a startup milestone once, in seconds since the process started"""
+    if not STARTUP_TRACE or event in startup_events or sys.stdout is None:
+        return
+    startup_events.add(event)
+    print(f"startup {event} {time.perf_counter() - START_TIME:.4f}", flush=True)
+    if event == 'first_chart' and STARTUP_TRACE == 'exit':
+        root.after(0, root.destroy)
 
-# Fix for PyInstaller matplotlib backend issues
-if getattr(sys, 'frozen', False):
-    # Running in a PyInstaller bundle
-    matplotlib.rcParams['backend'] = 'TkAgg'
-
-# Global variable to store custom colors
+# Custom colors by label name, so a color stays with its label when the
+# labels are edited or reordered
 custom_colors = {}
 
-def get_colors(n):
-    cmap = matplotlib.colormaps['tab20']
-    colors = []
-    for i in range(n):
-        if i in custom_colors:
-            # Use custom color if set
-            colors.append(custom_colors[i])
-        else:
-            # Use default color from colormap
-            colors.append(cmap(i / n))
-    return colors
-
-def hex_from_rgb(rgb):
-    return '#%02x%02x%02x' % tuple(int(255*x) for x in rgb[:3])
-
-def on_color_click(index, swatch, label_text):
+# Swatch rows shown in color_preview_frame as [swatch, label widget, hex color],
+# and the labels they currently display
+preview_rows = []
+preview_labels = []
+reset_btn = None
+
+# Wait this long after the last keystroke before refreshing the preview
+PREVIEW_DEBOUNCE_MS = 150
+preview_after_id = None
+chart_after_id = None
+
+# Exports render on a worker thread; finished jobs are picked up this often
+EXPORT_POLL_MS = 100
+export_polling = False
+
+# The embedded chart preview uses the export figure size at a screen-sized
+# dpi, so its layout matches the saved image (7in x 80dpi = 560px)
+PREVIEW_DPI = 80
+
+# "Save All Sizes" writes one file per target (see targets.PRESETS)
+EXPORT_TARGETS = ('thumbnail', 'web', 'retina', 'print')
+
+def on_color_click(index):
     """Handle color swatch click to open color picker"""
+    swatch = preview_rows[index][0]
     # Open color chooser dialog
     color = colorchooser.askcolor(
-        title=f"Choose color for '{label_text}'",
+        title=f"Choose color for '{preview_labels[index]}'",
         initialcolor=swatch['bg']
     )
     
     if color[0]:  # If a color was selected (not cancelled)
         # Convert RGB tuple to matplotlib format (0-1 range)
         rgb_matplotlib = tuple(c/255.0 for c in color[0])
-        custom_colors[index] = rgb_matplotlib
-        
-        # Update the swatch color
-        hex_color = color[1]  # This is the hex color from colorchooser
-        swatch.config(bg=hex_color)
+        custom_colors[preview_labels[index]] = rgb_matplotlib
         
         # Update the preview
         on_update_labels()
@@ -56,366 +81,264 @@ def reset_colors():
     custom_colors.clear()
     on_update_labels()
 
-def preview_colors(labels):
-    for widget in color_preview_frame.winfo_children():
-        widget.destroy()
+def add_preview_row(i, label, hex_color):
+    # Create clickable color swatch
+    swatch = Canvas(
+        color_preview_frame, width=20, height=20, bg=hex_color, 
+        highlightthickness=1, highlightbackground='#888',
+        cursor='hand2'  # Change cursor to indicate clickable
+    )
+    swatch.grid(row=i, column=0, padx=(0, 5), pady=2)
     
-    colors = get_colors(len(labels))
+    # Bind click event to open color picker; the row index never changes,
+    # the label text is looked up when clicked
+    swatch.bind("<Button-1>", lambda e, idx=i: on_color_click(idx))
+    
+    # Add tooltip-like behavior
+    def on_enter(e, sw=swatch):
+        sw.config(highlightbackground='#333', highlightthickness=2)
+    
+    def on_leave(e, sw=swatch):
+        sw.config(highlightbackground='#888', highlightthickness=1)
+    
+    swatch.bind("<Enter>", on_enter)
+    swatch.bind("<Leave>", on_leave)
+    
+    lbl = tk.Label(color_preview_frame, text=label, font=("Arial", 11))
+    lbl.grid(row=i, column=1, sticky='w', pady=2)
+    preview_rows.append([swatch, lbl, hex_color])
+
+def colors_for(labels):
+    """The custom colors of labels that are still there.
+
+    Colors of deleted labels are kept (the label may come back) but never
+    passed on: a stale name like "1" would otherwise be read as an index.
+    """
+    return {label: custom_colors[label] for label in labels if label in custom_colors}
+
+def preview_colors(labels):
+    """Bring the swatches in line with labels, touching only rows that changed"""
+    global reset_btn
+    overrides = palette.overrides_by_index(labels, colors_for(labels))
+    colors = palette.get_palette(len(labels), overrides, var_palette.get()).hex
+
+    # Remove rows for labels that are gone
+    while len(preview_rows) > len(labels):
+        swatch, lbl, _ = preview_rows.pop()
+        swatch.destroy()
+        lbl.destroy()
+
     for i, label in enumerate(labels):
-        hex_color = hex_from_rgb(colors[i])
-        
-        # Create clickable color swatch
-        swatch = Canvas(
-            color_preview_frame, width=20, height=20, bg=hex_color, 
-            highlightthickness=1, highlightbackground='#888',
-            cursor='hand2'  # Change cursor to indicate clickable
-        )
-        swatch.grid(row=i, column=0, padx=(0, 5), pady=2)
-        
-        # Bind click event to open color picker
-        swatch.bind("<Button-1>", lambda e, idx=i, sw=swatch, lbl=label: on_color_click(idx, sw, lbl))
-        
-        # Add tooltip-like behavior
-        def on_enter(e, sw=swatch):
-            sw.config(highlightbackground='#333', highlightthickness=2)
-        
-        def on_leave(e, sw=swatch):
-            sw.config(highlightbackground='#888', highlightthickness=1)
-        
-        swatch.bind("<Enter>", on_enter)
-        swatch.bind("<Leave>", on_leave)
-        
-        lbl = tk.Label(color_preview_frame, text=label, font=("Arial", 11))
-        lbl.grid(row=i, column=1, sticky='w', pady=2)
+        hex_color = colors[i]
+        if i >= len(preview_rows):
+            add_preview_row(i, label, hex_color)
+            continue
+        row = preview_rows[i]
+        if row[2] != hex_color:
+            row[0].config(bg=hex_color)
+            row[2] = hex_color
+        if preview_labels[i] != label:
+            row[1].config(text=label)
+    preview_labels[:] = labels
     
-    # Add reset colors button
-    if labels:  # Only show if there are labels
+    # Reset colors button sits below the last row, only if there are labels
+    if reset_btn is None:
         reset_btn = tk.Button(
             color_preview_frame, text="Reset Colors", 
             command=reset_colors, font=("Arial", 9),
             relief="flat", bg="#f0f0f0", fg="#666"
         )
+    if labels:
         reset_btn.grid(row=len(labels), column=0, columnspan=2, pady=(10, 0), sticky='w')
-    
-    color_preview_frame.update()
-
-def make_chart(save_path=None):
-    chart_type = var_chart_type.get()
-    title = entry_title.get().strip()
-    labels = [x.strip() for x in entry_labels.get().strip().split(',') if x.strip()]
-    sizes_str = entry_sizes.get().strip().split(',')
-    
-    # Get checkbox states
-    show_title = var_show_title.get()
-    show_labels = var_show_labels.get()
-    show_percentages = var_show_percentages.get()
-
-    if not title or not labels or not entry_sizes.get().strip():
-        messagebox.showerror("Input Error", "Please fill out all fields!")
+    else:
+        reset_btn.grid_remove()
+
+def get_chart_spec():
+    """Snapshot the current widget values as a chart spec for render.py"""
+    labels = entry_labels.get()
+    return {
+        'type': var_chart_type.get(),
+        'title': entry_title.get().strip(),
+        'labels': labels,
+        'sizes': entry_sizes.get(),
+        'custom_colors': colors_for(x.strip() for x in labels.split(',')),
+        'palette': var_palette.get(),
+        'show_title': var_show_title.get(),
+        'show_labels': var_show_labels.get(),
+        'show_percentages': var_show_percentages.get(),
+    }
+
+def read_chart_spec(show_errors=True):
+    """Validated spec from the widgets, or None if the input is incomplete"""
+    spec = get_chart_spec()
+    if not spec['title'] or not spec['labels'].strip() or not spec['sizes'].strip():
+        error = "Please fill out all fields!"
+    else:
+        try:
+            return render.normalize_spec(spec)
+        except ValueError as e:
+            error = str(e)
+    if show_errors:
+        messagebox.showerror("Input Error", error)
+    return None
+
+def make_chart(save_path=None, targets=None):
+    load_plotting()
+    spec = read_chart_spec()
+    if spec is None:
         return
 
-    try:
-        sizes = [float(x) for x in sizes_str]
-    except ValueError:
-        messagebox.showerror("Input Error", "Values must be numbers, comma-separated (e.g. 10,20,30)")
+    if not save_path:
+        live_preview.show(spec)
         return
 
-    if len(labels) != len(sizes):
-        messagebox.showerror(
-            "Input Error",
-            f"Labels and values must have the same number of items.\n"
-            f"Labels: {len(labels)}, Values: {len(sizes)}"
-        )
+    # The spec is a snapshot, so edits made while the export is queued or
+    # rendering do not change the saved chart
+    spec['format'] = os.path.splitext(save_path)[1][1:].lower() or 'png'
+    export_queue.submit(spec, save_path, targets)
+    update_export_status()
+    if not export_polling:
+        poll_exports()
+
+def poll_exports():
+    """Collect finished exports on the Tk thread while any are in flight"""
+    global export_polling
+    for job in export_queue.poll():
+        if job.status == exporter.FAILED:
+            messagebox.showerror("Export Failed", f"Could not save {job.path}:\n{job.error}")
+        elif job.status == exporter.DONE and not export_queue.active():
+            saved = "\n".join(job.paths)
+            messagebox.showinfo("Saved!", f"Chart saved as:\n{saved}")
+    update_export_status()
+    export_polling = bool(export_queue.active())
+    if export_polling:
+        root.after(EXPORT_POLL_MS, poll_exports)
+
+def update_export_status():
+    active = export_queue.active() if export_queue is not None else []
+    if active:
+        text = f"Exporting {os.path.basename(active[0].path)}..."
+        if len(active) > 1:
+            text += f" ({len(active) - 1} more queued)"
+        export_status.config(text=text)
+        export_progress.grid()
+        export_progress.start(15)
+        export_cancel_btn.grid()
+    else:
+        export_status.config(text="")
+        export_progress.stop()
+        export_progress.grid_remove()
+        export_cancel_btn.grid_remove()
+
+def cancel_exports():
+    """Drop every queued export; a render already running is discarded"""
+    export_queue.cancel_all()
+    export_status.config(text="Cancelling...")
+
+def update_chart_preview(*args):
+    """Redraw the embedded preview; incomplete input keeps the last chart"""
+    global chart_after_id
+    chart_after_id = None
+    if live_preview is None:
+        # Still loading; load_plotting draws the first chart when it is done
         return
+    spec = read_chart_spec(show_errors=False)
+    if spec is not None:
+        live_preview.show(spec)
 
-    colors = get_colors(len(labels))
-    total = sum(sizes)
-    percentages = [size / total * 100 for size in sizes]
-
-    # Consistent text properties for all charts
-    label_props = {'fontsize': 14, 'weight': 'medium', 'color': '#222'}
-    pct_props = {'fontsize': 12, 'weight': 'bold', 'color': 'white'}
-    pct_bbox = dict(boxstyle='round,pad=0.3', fc='#364FC7', alpha=0.9, ec='none')
-    title_props = {'fontsize': 22, 'fontweight': 'bold', 'color': '#1a1a1a', 'pad': 30}
+def schedule_chart_preview(event=None):
+    """Debounced update_chart_preview for keystrokes in the title and values"""
+    global chart_after_id
+    if chart_after_id is not None:
+        root.after_cancel(chart_after_id)
+    chart_after_id = root.after(PREVIEW_DEBOUNCE_MS, update_chart_preview)
 
-    fig, ax = plt.subplots(figsize=(7, 7), dpi=130)
-    
-    if chart_type == 'pie':
-        # Calculate if slices are too small for internal labels
-        min_pct_for_internal = 8.0
-        
-        # Determine what to show in pie chart
-        pie_labels = labels if show_labels else None
-        
-        # Always use autopct='' and handle percentages manually
-        wedges, texts, autotexts = ax.pie(
-            sizes, labels=pie_labels, colors=colors,
-            autopct='', startangle=90,
-            wedgeprops=dict(edgecolor='#FAFAFA', linewidth=3, alpha=0.92, antialiased=True),
-            textprops=label_props,
-            labeldistance=1.15
-        )
-        
-        # Add percentages manually if enabled
-        if show_percentages:
-            for i, (pct, wedge) in enumerate(zip(percentages, wedges)):
-                ang = (wedge.theta2 - wedge.theta1) / 2. + wedge.theta1
-                if pct >= min_pct_for_internal:
-                    # Internal percentage
-                    x = 0.7 * np.cos(np.radians(ang))
-                    y = 0.7 * np.sin(np.radians(ang))
-                    ax.text(x, y, f'{pct:.1f}%', ha='center', va='center',
-                           color=pct_props['color'], fontsize=pct_props['fontsize'],
-                           weight=pct_props['weight'], bbox=pct_bbox)
-                else:
-                    # External percentage for small slices
-                    x = 1.15 * np.cos(np.radians(ang))
-                    y = 1.1 * np.sin(np.radians(ang))
-                    ax.text(x, y, f'{pct:.1f}%', ha='center', va='center',
-                           color=pct_props['color'], fontsize=pct_props['fontsize']-1,
-                           weight=pct_props['weight'], bbox=pct_bbox)
-        
-        if show_title:
-            ax.set_title(title, **title_props)
-        ax.axis('equal')
-        
-    elif chart_type == 'donut':
-        # Calculate if slices are too small for internal labels
-        min_pct_for_internal = 8.0
-        
-        # Determine what to show in donut chart
-        donut_labels = labels if show_labels else None
-        
-        # Always use autopct='' and handle percentages manually
-        wedges, texts, autotexts = ax.pie(
-            sizes, labels=donut_labels, colors=colors,
-            autopct='', startangle=90,
-            wedgeprops=dict(width=0.5, edgecolor='#FAFAFA', linewidth=3, alpha=0.95, antialiased=True),
-            textprops=label_props,
-            labeldistance=1.15
-        )
-        centre_circle = plt.Circle((0,0), 0.50, fc='white', lw=0)
-        fig.gca().add_artist(centre_circle)
-        
-        # Add percentages manually if enabled
-        if show_percentages:
-            for i, (pct, wedge) in enumerate(zip(percentages, wedges)):
-                ang = (wedge.theta2 - wedge.theta1) / 2. + wedge.theta1
-                if pct >= min_pct_for_internal:
-                    # Internal percentage (in the donut ring)
-                    x = 0.75 * np.cos(np.radians(ang))
-                    y = 0.75 * np.sin(np.radians(ang))
-                    ax.text(x, y, f'{pct:.1f}%', ha='center', va='center',
-                           color=pct_props['color'], fontsize=pct_props['fontsize'],
-                           weight=pct_props['weight'], bbox=pct_bbox)
-                else:
-                    # External percentage for small slices
-                    x = 1.15 * np.cos(np.radians(ang))
-                    y = 1.1 * np.sin(np.radians(ang))
-                    ax.text(x, y, f'{pct:.1f}%', ha='center', va='center',
-                           color=pct_props['color'], fontsize=pct_props['fontsize']-1,
-                           weight=pct_props['weight'], bbox=pct_bbox)
-        
-        if show_title:
-            ax.set_title(title, **title_props)
-        ax.axis('equal')
-
-    elif chart_type == 'radial':
-        # Clear and create radial bar chart
-        fig.clf()
-        N = len(labels)
-        angles = np.linspace(0, 2 * np.pi, N, endpoint=False)
-        width = 2 * np.pi / N * 0.7
-        ax = plt.subplot(111, polar=True)
-        bars = ax.bar(
-            angles, sizes, width=width, bottom=0.0, color=colors,
-            edgecolor='#FFFFFF', linewidth=2, alpha=0.92
-        )
-
-        max_size = max(sizes)
-        min_size = min(sizes)
-        
-        # Dynamic thresholds based on data distribution
-        min_pct_for_internal = 8.0  # Same as pie chart
-        min_size_for_internal = max_size * 0.25  # 25% of max size
-        
-        # Calculate dynamic label positioning
-        avg_size = np.mean(sizes)
-        base_label_distance = 1.08 + (0.15 * (avg_size / max_size))  # Dynamic base distance
-        
-        # Add percentages with better positioning if enabled
-        if show_percentages:
-            for i, (bar, angle, pct, size) in enumerate(zip(bars, angles, percentages, sizes)):
-                r = bar.get_height()
-                
-                # More sophisticated percentage positioning
-                if pct >= min_pct_for_internal and size >= min_size_for_internal:
-                    # Internal percentage for larger bars
-                    pct_position = 0.6 if pct > 15 else 0.7  # Higher position for larger percentages
-                    ax.text(
-                        angle, r * pct_position,
-                        f"{pct:.1f}%", ha='center', va='center',
-                        color=pct_props['color'], fontsize=pct_props['fontsize'],
-                        fontweight=pct_props['weight'], bbox=pct_bbox
-                    )
-                else:
-                    # External percentage for small bars - closer to the bar
-                    external_radius = max(r * 0.3, max_size * 0.3)  # Minimum distance but not too far
-                    ax.text(
-                        angle, external_radius,
-                        f"{pct:.1f}%", ha='center', va='center',
-                        color=pct_props['color'], fontsize=pct_props['fontsize']-1,
-                        fontweight=pct_props['weight'], bbox=pct_bbox
-                    )
-        
-        # Add labels if enabled
-        if show_labels:
-            # Dynamic label positioning based on individual bar sizes
-            for i, (angle, label, size) in enumerate(zip(angles, labels, sizes)):
-                # Calculate dynamic label distance based on bar size
-                size_factor = size / max_size
-                label_distance = base_label_distance + (0.1 * size_factor)  # Closer for smaller bars
-                label_radius = max_size * label_distance
-                
-                # Determine text alignment based on position
-                ha = 'center'
-                if np.cos(angle - np.pi/2) > 0.1:
-                    ha = 'left'
-                elif np.cos(angle - np.pi/2) < -0.1:
-                    ha = 'right'
-                    
-                va = 'center'
-                if np.sin(angle - np.pi/2) > 0.1:
-                    va = 'bottom'
-                elif np.sin(angle - np.pi/2) < -0.1:
-                    va = 'top'
-                
-                ax.text(angle, label_radius, label, 
-                    ha=ha, va=va, **label_props)
-
-        if show_title:
-            ax.set_title(title, **title_props)
-        ax.set_ylim(0, max_size * (base_label_distance + 0.25))  # Dynamic spacing
-        ax.set_yticklabels([])
-        ax.set_xticklabels([])
-        ax.spines['polar'].set_visible(False)
-        ax.grid(False)
-        ax.set_frame_on(False)
-        plt.tight_layout()
-
-    elif chart_type == 'rose':
-        fig.clf()
-        N = len(labels)
-        angles = np.linspace(0, 2 * np.pi, N, endpoint=False)
-        width = 2 * np.pi / N
-        radii = np.array(sizes)
-        ax = plt.subplot(111, polar=True)
-        bars = ax.bar(
-            angles, radii, width=width, bottom=0.0, color=colors,
-            edgecolor='#FAFAFA', linewidth=2, alpha=0.92
-        )
-        
-        max_radius = max(radii)
-        min_radius = min(radii)
-        avg_radius = np.mean(radii)
-        
-        # Dynamic thresholds based on actual data distribution
-        min_pct_for_internal = 8.0  # Same as pie chart
-        min_radius_for_internal = max_radius * 0.2  # 20% of max radius
-        
-        # Calculate dynamic positioning factors
-        radius_range = max_radius - min_radius
-        base_label_distance = 1.12 + (0.08 * (avg_radius / max_radius))  # Dynamic base distance
-        
-        # Add percentages if enabled
-        if show_percentages:
-            for i, (bar, angle, pct, label) in enumerate(zip(bars, angles, percentages, labels)):
-                r = bar.get_height()
-                
-                # More sophisticated percentage positioning
-                if pct >= min_pct_for_internal and r >= min_radius_for_internal:
-                    # Internal percentage for larger bars
-                    pct_position = 0.65 if pct > 15 else 0.75  # Adjust position based on percentage
-                    font_size = max(10, min(13, pct_props['fontsize'] * max(0.8, pct / 12)))
-                    
-                    ax.text(
-                        angle, r * pct_position,
-                        f"{pct:.1f}%", ha='center', va='center',
-                        color=pct_props['color'], fontsize=font_size,
-                        fontweight=pct_props['weight'],
-                        bbox=pct_bbox
-                    )
-                else:
-                    # External percentage for small bars - adaptive positioning
-                    external_radius = max(r * 0.3, max_radius * 0.3)  # Closer to small bars
-                    font_size = max(9, min(11, pct_props['fontsize'] * 0.85))
-                    
-                    ax.text(
-                        angle, external_radius,
-                        f"{pct:.1f}%", ha='center', va='center',
-                        color=pct_props['color'], fontsize=font_size,
-                        fontweight=pct_props['weight'],
-                        bbox=pct_bbox
-                    )
-        
-        # Add labels if enabled
-        if show_labels:
-            # Dynamic label positioning based on individual bar sizes
-            for i, (angle, label, radius) in enumerate(zip(angles, labels, radii)):
-                # Calculate dynamic label distance based on bar size
-                radius_factor = radius / max_radius
-                label_distance = base_label_distance + (0.06 * radius_factor)  # Closer for smaller bars
-                label_radius = max_radius * label_distance
-                
-                # Determine text alignment based on position (like pie chart)
-                ha = 'center'
-                if np.cos(angle - np.pi/2) > 0.1:
-                    ha = 'left'
-                elif np.cos(angle - np.pi/2) < -0.1:
-                    ha = 'right'
-                    
-                va = 'center'
-                if np.sin(angle - np.pi/2) > 0.1:
-                    va = 'bottom'
-                elif np.sin(angle - np.pi/2) < -0.1:
-                    va = 'top'
-                
-                # Position label without rotation
-                ax.text(
-                    angle, label_radius,
-                    label,
-                    ha=ha, va=va,
-                    rotation=0,  # No rotation for better readability
-                    **label_props
-                )
-
-        # Set chart limits and styling with dynamic spacing
-        ax.set_ylim(0, max_radius * (base_label_distance + 0.2))
-        ax.set_yticklabels([])
-        ax.set_xticklabels([])
-        ax.spines['polar'].set_visible(False)
-        ax.grid(False)
-        ax.set_axisbelow(True)
-        ax.set_frame_on(False)
-        if show_title:
-            ax.set_title(title, **title_props)
-
-    plt.tight_layout()
-
-    if save_path:
-        fig.savefig(save_path, bbox_inches='tight', dpi=150, transparent=True)
-        plt.close(fig)
-        messagebox.showinfo("Saved!", f"Chart saved as:\n{save_path}")
+def on_update_labels(event=None):
+    """Refresh the color preview; keystrokes are debounced, other calls are not"""
+    global preview_after_id
+    if preview_after_id is not None:
+        root.after_cancel(preview_after_id)
+        preview_after_id = None
+    if event is not None:
+        preview_after_id = root.after(PREVIEW_DEBOUNCE_MS, refresh_preview)
     else:
-        plt.show()
+        refresh_preview()
 
-def on_update_labels(event=None):
+def refresh_preview():
+    global preview_after_id
+    preview_after_id = None
+    if render is None:
+        return
     labels = [x.strip() for x in entry_labels.get().strip().split(',') if x.strip()]
-    if labels:
-        preview_colors(labels)
+    preview_colors(labels)
+    update_chart_preview()
+
+def prewarm_plotting():
+    """Import the plotting stack and draw a throwaway chart (worker thread)
+
+    Only modules are touched here, never a widget. The first render also
+    fills matplotlib's font cache, which would otherwise stall the first
+    real preview.
+    """
+    import render
+    import preview
+    import exporter
+    render.render_chart({'type': 'pie', 'labels': ['a', 'b'], 'sizes': [1, 1]})
+
+def start_plotting():
+    global plotting_thread
+    plotting_thread = threading.Thread(target=prewarm_plotting, name='plotting-prewarm', daemon=True)
+    plotting_thread.start()
+    root.after(PLOTTING_POLL_MS, poll_plotting)
+
+def poll_plotting():
+    if plotting_thread.is_alive():
+        root.after(PLOTTING_POLL_MS, poll_plotting)
     else:
-        for widget in color_preview_frame.winfo_children():
-            widget.destroy()
+        load_plotting()
+
+def load_plotting():
+    """Create the chart preview and export queue once the imports are done
+
+    Runs on the Tk thread. Safe to call repeatedly; the Show/Save buttons
+    call it directly and wait for the background imports if they are early.
+    """
+    global render, exporter, palette, live_preview, export_queue
+    if render is not None:
+        return
+    plotting_thread.join()
+
+    import matplotlib
+    matplotlib.use('TkAgg')  # Force matplotlib to use TkAgg backend
+    # Fix for PyInstaller matplotlib backend issues
+    if getattr(sys, 'frozen', False):
+        # Running in a PyInstaller bundle
+        matplotlib.rcParams['backend'] = 'TkAgg'
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+    import render as render_module
+    import exporter as exporter_module
+    import palette as palette_module
+    from preview import LivePreview
+
+    loading_label.destroy()
+    preview_canvas = FigureCanvasTkAgg(Figure(figsize=render_module.FIGSIZE, dpi=PREVIEW_DPI), master=root)
+    preview_canvas.get_tk_widget().grid(row=0, column=2, rowspan=12, sticky='n', padx=(8, 8), pady=8)
+    preview_canvas.mpl_connect('draw_event', lambda event: trace_startup('first_chart'))
+    live_preview = LivePreview(preview_canvas)
+    export_queue = exporter_module.ExportQueue()
+    # The palette menu starts out with just the default
+    menu = palette_menu['menu']
+    menu.delete(0, 'end')
+    for name in palette_module.PALETTE_NAMES:
+        menu.add_command(label=name, command=tk._setit(var_palette, name))
+
+    render, exporter, palette = render_module, exporter_module, palette_module
+    on_update_labels()
+
+def on_first_map(event):
+    if event.widget is root:
+        trace_startup('first_window')
 
 def save_chart():
     file_path = filedialog.asksaveasfilename(
@@ -426,10 +349,19 @@ def save_chart():
     if file_path:
         make_chart(save_path=file_path)
 
+def save_all_sizes():
+    file_path = filedialog.asksaveasfilename(
+        defaultextension=".png",
+        filetypes=[("All sizes (name-thumbnail.png, ...)", "*.*")],
+        title="Save All Sizes As..."
+    )
+    if file_path:
+        make_chart(save_path=file_path, targets=EXPORT_TARGETS)
+
 # ---- Tkinter GUI ----
 root = tk.Tk()
 root.title("Chart Designer")
-root.geometry("570x650")  # Increased height for new checkboxes
+root.geometry("1150x650")  # Room for the embedded chart preview
 root.resizable(False, False)
 
 font_label = ("Arial", 13, "bold")
@@ -440,6 +372,7 @@ tk.Label(root, text="Chart Title:", font=font_label).grid(row=0, column=0, stick
 entry_title = tk.Entry(root, width=36, font=font_entry)
 entry_title.insert(0, "My Chart")
 entry_title.grid(row=0, column=1, sticky='w', **padding)
+entry_title.bind("<KeyRelease>", schedule_chart_preview)
 
 tk.Label(root, text="Labels (comma):", font=font_label).grid(row=1, column=0, sticky='e', **padding)
 entry_labels = tk.Entry(root, width=36, font=font_entry)
@@ -451,12 +384,22 @@ tk.Label(root, text="Values (comma):", font=font_label).grid(row=2, column=0, st
 entry_sizes = tk.Entry(root, width=36, font=font_entry)
 entry_sizes.insert(0, "20,20,20,20,20")
 entry_sizes.grid(row=2, column=1, sticky='w', **padding)
+entry_sizes.bind("<KeyRelease>", schedule_chart_preview)
 
 tk.Label(root, text="Chart Type:", font=font_label).grid(row=3, column=0, sticky='e', **padding)
 var_chart_type = tk.StringVar(value="pie")
-chart_type_menu = tk.OptionMenu(root, var_chart_type, "pie", "donut", "rose", "radial")
+type_frame = tk.Frame(root)
+type_frame.grid(row=3, column=1, sticky='w', **padding)
+chart_type_menu = tk.OptionMenu(type_frame, var_chart_type, "pie", "donut", "rose", "radial")
 chart_type_menu.config(font=font_entry)
-chart_type_menu.grid(row=3, column=1, sticky='w', **padding)
+chart_type_menu.grid(row=0, column=0, sticky='w')
+tk.Label(type_frame, text="Palette:", font=font_label).grid(row=0, column=1, padx=(18, 6))
+var_palette = tk.StringVar(value="tab20")
+palette_menu = tk.OptionMenu(type_frame, var_palette, "tab20")
+palette_menu.config(font=font_entry)
+palette_menu.grid(row=0, column=2, sticky='w')
+# A new palette recolors the swatches as well as the chart
+var_palette.trace_add('write', lambda *args: on_update_labels())
 
 # Display Options Section
 tk.Label(root, text="Display Options:", font=font_label).grid(row=4, column=0, sticky='e', **padding)
@@ -472,6 +415,16 @@ tk.Checkbutton(display_frame, text="Show Title", variable=var_show_title, font=(
 tk.Checkbutton(display_frame, text="Show Labels", variable=var_show_labels, font=("Arial", 11)).grid(row=0, column=1, sticky='w', padx=(0, 15))
 tk.Checkbutton(display_frame, text="Show Percentages", variable=var_show_percentages, font=("Arial", 11)).grid(row=0, column=2, sticky='w')
 
+# Redraw the preview whenever the chart type or a display option changes
+for var in (var_chart_type, var_show_title, var_show_labels, var_show_percentages):
+    var.trace_add('write', update_chart_preview)
+
+# Embedded chart preview, to the right of the inputs; load_plotting swaps
+# this placeholder for the real canvas
+loading_label = tk.Label(root, text="Loading chart preview...", font=("Arial", 11), fg="#666",
+                         width=70, height=35)
+loading_label.grid(row=0, column=2, rowspan=12, sticky='n', padx=(8, 8), pady=8)
+
 tk.Label(root, text="Colors (click to edit):", font=font_label).grid(row=5, column=0, sticky='ne', **padding)
 color_preview_frame = tk.Frame(root)
 color_preview_frame.grid(row=5, column=1, sticky='w', **padding)
@@ -487,5 +440,25 @@ tk.Button(
     btn_frame, text="Save as PNG", command=save_chart, font=("Arial", 14, "bold"),
     width=16, height=2, relief="raised"
 ).grid(row=0, column=1, padx=18)
-
+tk.Button(
+    btn_frame, text="Save All Sizes (thumbnail, web, retina, print)", command=save_all_sizes,
+    font=("Arial", 11), relief="raised"
+).grid(row=1, column=0, columnspan=2, pady=(10, 0))
+
+# Export progress, only shown while exports are queued or running
+export_frame = tk.Frame(root)
+export_frame.grid(row=11, columnspan=2)
+export_progress = ttk.Progressbar(export_frame, mode='indeterminate', length=160)
+export_progress.grid(row=0, column=0, padx=(0, 8))
+export_status = tk.Label(export_frame, text="", font=("Arial", 11), fg="#666")
+export_status.grid(row=0, column=1)
+export_cancel_btn = tk.Button(
+    export_frame, text="Cancel", command=cancel_exports, font=("Arial", 9),
+    relief="flat", bg="#f0f0f0", fg="#666"
+)
+export_cancel_btn.grid(row=0, column=2, padx=(8, 0))
+update_export_status()
+
+root.bind('<Map>', on_first_map, add='+')
+start_plotting()
 root.mainloop()
\ No newline at end of file
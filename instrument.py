@@ -0,0 +1,188 @@
+"""Optional timing and counter events for the render pipeline.
+
+render.py wraps each stage of a render in span() (parse, colors, axes,
+text_layout, tight_layout, savefig and the whole render) and reports
+counters with count() (text artists, output bytes). Events go to every
+registered sink; with no sink registered, span() hands back a shared no-op
+context manager and count() returns at once, so the hooks cost next to
+nothing.
+
+    from instrument import RingBufferSink, add_sink
+
+    sink = add_sink(RingBufferSink())
+    render_chart(spec)
+    for event in sink.events():
+        print(event['kind'], event['name'], event['value'])
+
+An event is a dict with kind ('span' or 'count'), name, value (seconds for
+spans), fields (e.g. chart_type) and time (a Unix timestamp). A sink is any
+object with an emit(event) method; it may be called from several threads.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+
+_sinks = []
+
+
+def add_sink(sink):
+    """Start sending events to sink and return it"""
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def enabled():
+    return bool(_sinks)
+
+
+def _emit(event):
+    for sink in _sinks:
+        sink.emit(event)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duration = time.perf_counter() - self._start
+        _emit({'kind': 'span', 'name': self.name, 'value': duration,
+               'fields': self.fields, 'time': time.time()})
+        return False
+
+
+def span(name, **fields):
+    """Context manager that reports how long its body took"""
+    if not _sinks:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+def count(name, value=1, **fields):
+    """Report a counter value, e.g. count('output_bytes', len(data))"""
+    if _sinks:
+        _emit({'kind': 'count', 'name': name, 'value': value,
+               'fields': fields, 'time': time.time()})
+
+
+class LogSink:
+    """Writes every event as one JSON line to a logger"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('chart_designer.metrics')
+        self.level = level
+
+    def emit(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, '%s', json.dumps(event, default=str))
+
+
+class RingBufferSink:
+    """Keeps the last capacity events in memory"""
+
+    def __init__(self, capacity=1000):
+        self._events = deque(maxlen=capacity)
+
+    def emit(self, event):
+        self._events.append(event)
+
+    def events(self):
+        """Oldest first"""
+        return list(self._events)
+
+    def clear(self):
+        self._events.clear()
+
+
+class PrometheusSink:
+    """Aggregates events into Prometheus text-format metrics.
+
+    Spans become <prefix>_span_seconds_sum/_count, counters become
+    <prefix>_<name>_total, labelled by span name and by the event's string
+    fields. With path set, the metrics are also written there (atomically,
+    at most every write_interval seconds and on flush()) for the
+    node_exporter textfile collector.
+    """
+
+    def __init__(self, path=None, prefix='chart_designer', write_interval=1.0):
+        self.path = path
+        self.prefix = prefix
+        self.write_interval = write_interval
+        self._lock = threading.Lock()
+        self._spans = OrderedDict()
+        self._counters = OrderedDict()
+        self._last_write = 0.
+
+    def emit(self, event):
+        labels = tuple(sorted((k, v) for k, v in event['fields'].items() if isinstance(v, str)))
+        with self._lock:
+            if event['kind'] == 'span':
+                key = (('span', event['name']),) + labels
+                total, n = self._spans.get(key, (0., 0))
+                self._spans[key] = (total + event['value'], n + 1)
+            else:
+                key = (event['name'], labels)
+                self._counters[key] = self._counters.get(key, 0) + event['value']
+        if self.path and time.monotonic() - self._last_write >= self.write_interval:
+            self.flush()
+
+    def render_text(self):
+        """The current metrics in Prometheus text exposition format"""
+        def label_str(labels):
+            if not labels:
+                return ''
+            return '{' + ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+                                  for k, v in labels) + '}'
+
+        name = f'{self.prefix}_span_seconds'
+        lines = [f'# HELP {name} Time spent in each render stage',
+                 f'# TYPE {name} summary']
+        with self._lock:
+            for labels, (total, n) in self._spans.items():
+                lines.append(f'{name}_sum{label_str(labels)} {total:.6f}')
+                lines.append(f'{name}_count{label_str(labels)} {n}')
+            counters = list(self._counters.items())
+        typed = set()
+        for (counter, labels), value in counters:
+            name = f'{self.prefix}_{counter}_total'
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name}{label_str(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        """Write the metrics file now (no-op without a path)"""
+        if not self.path:
+            return
+        self._last_write = time.monotonic()
+        text = self.render_text()
+        # Scrapers must never see a half-written file
+        fd, tmp = tempfile.mkstemp(prefix='.metrics-', dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, self.path)
@@ -0,0 +1,207 @@
+"""Vectorized label and percentage placement.
+
+Every anchor, font size and alignment for a chart is computed in one pass
+of NumPy array operations, reproducing the per-slice heuristics the chart
+types have always used. Charts with many categories additionally get a
+collision-avoidance pass for their outside labels (see spread_labels).
+"""
+import numpy as np
+
+# Slices below this share of the total get their percentage drawn outside
+MIN_PCT_FOR_INTERNAL = 8.0
+
+# Charts with fewer categories than this keep the classic label positions;
+# from this many on, outside labels are spread apart so they do not overlap
+SPREAD_MIN_CATEGORIES = 20
+
+# Rough size of one data unit in points on the default 7x7 figure: the pie
+# axes span about 2.2 units, a polar axes radius is about half its height
+PIE_POINTS_PER_UNIT = 180.
+POLAR_POINTS_PER_UNIT = 200.
+
+
+def text_height(fontsize, pad=0.):
+    """Approximate height in points of a one-line label (pad is the bbox pad)"""
+    return np.asarray(fontsize) * (1.2 + 2 * pad)
+
+
+def text_width(chars, fontsize, pad=0.):
+    """Approximate width in points of a one-line label of chars characters"""
+    # 0.65 em covers the widest digits of DejaVu Sans Bold
+    return np.asarray(fontsize) * (0.65 * np.asarray(chars) + 2 * pad)
+
+
+def box_radius(x, y, width, height):
+    """Distance from the centre to the far corner of boxes centred on (x, y)"""
+    return np.hypot(np.abs(x) + width / 2, np.abs(y) + height / 2)
+
+
+def side_alignment(x):
+    """ha for spread labels: away from the vertical axis, on the side of x"""
+    return np.where(np.asarray(x) >= 0, 'left', 'right')
+
+
+def pie_layout(sizes, internal_radius, label_distance=1.15, pct_fontsize=12):
+    """Wedge angles and label anchors for a pie or donut.
+
+    Wedges start at 90 degrees and run counter-clockwise, like Axes.pie with
+    startangle=90. Returns a dict of arrays, one entry per slice.
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    percentages = sizes / sizes.sum() * 100
+    bounds = 360. * np.cumsum(np.concatenate(([0.25], sizes / sizes.sum())))
+    theta1, theta2 = bounds[:-1], bounds[1:]
+
+    thetam = np.radians((theta1 + theta2) / 2)
+    label_x = label_distance * np.cos(thetam)
+    label_y = label_distance * np.sin(thetam)
+
+    # Percentages go inside big slices and just outside small ones
+    ang = np.radians((theta2 - theta1) / 2. + theta1)
+    internal = percentages >= MIN_PCT_FOR_INTERNAL
+    pct_x = np.where(internal, internal_radius, 1.15) * np.cos(ang)
+    pct_y = np.where(internal, internal_radius, 1.1) * np.sin(ang)
+
+    return {
+        'percentages': percentages,
+        'theta1': theta1,
+        'theta2': theta2,
+        'label_x': label_x,
+        'label_y': label_y,
+        'label_ha': np.where(label_x > 0, 'left', 'right'),
+        'pct_x': pct_x,
+        'pct_y': pct_y,
+        'pct_internal': internal,
+        'pct_fontsize': np.where(internal, pct_fontsize, pct_fontsize - 1.),
+    }
+
+
+def label_alignment(angles):
+    """ha/va arrays for polar labels so they grow away from the chart"""
+    cos = np.cos(np.asarray(angles) - np.pi/2)
+    sin = np.sin(np.asarray(angles) - np.pi/2)
+    ha = np.where(cos > 0.1, 'left', np.where(cos < -0.1, 'right', 'center'))
+    va = np.where(sin > 0.1, 'bottom', np.where(sin < -0.1, 'top', 'center'))
+    return ha, va
+
+
+def polar_layout(sizes, rose=False, pct_fontsize=12, scale=None):
+    """Bar angles and label anchors for a radial bar or rose chart.
+
+    Radii are in data units; ylim is the upper radial limit that leaves room
+    for the labels. scale, if given, is a set of sizes (no smaller than
+    sizes) that fixes ylim, the label ring and where outside percentages
+    go, so the frames of an animation share them. Returns a dict of arrays,
+    one entry per bar.
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    scale = sizes if scale is None else np.asarray(scale, dtype=float)
+    n = len(sizes)
+    percentages = sizes / sizes.sum() * 100
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    max_size = scale.max()
+    ratio = scale / max_size
+
+    if rose:
+        # Dynamic thresholds based on actual data distribution
+        internal = (percentages >= MIN_PCT_FOR_INTERNAL) & (sizes >= max_size * 0.2)
+        pct_position = np.where(percentages > 15, 0.65, 0.75)
+        internal_fontsize = np.clip(pct_fontsize * np.maximum(0.8, percentages / 12), 10, 13)
+        external_fontsize = max(9, min(11, pct_fontsize * 0.85))
+        base_label_distance = 1.12 + (0.08 * np.mean(scale) / max_size)
+        label_distance = base_label_distance + 0.06 * ratio
+        ylim = max_size * (base_label_distance + 0.2)
+    else:
+        internal = (percentages >= MIN_PCT_FOR_INTERNAL) & (sizes >= max_size * 0.25)
+        pct_position = np.where(percentages > 15, 0.6, 0.7)
+        internal_fontsize = pct_fontsize
+        external_fontsize = pct_fontsize - 1.
+        base_label_distance = 1.08 + (0.15 * np.mean(scale) / max_size)
+        label_distance = base_label_distance + 0.1 * ratio
+        ylim = max_size * (base_label_distance + 0.25)
+
+    # Small bars get their percentage at a minimum distance from the centre
+    external_radius = np.maximum(sizes * 0.3, max_size * 0.3)
+    ha, va = label_alignment(angles)
+
+    return {
+        'percentages': percentages,
+        'angles': angles,
+        'label_r': max_size * label_distance,
+        'label_ha': ha,
+        'label_va': va,
+        'pct_r': np.where(internal, sizes * pct_position, external_radius),
+        'pct_internal': internal,
+        'pct_fontsize': np.where(internal, internal_fontsize, external_fontsize),
+        'ylim': ylim,
+    }
+
+
+def _spread_1d(y, gap, lo, hi):
+    """Push sorted positions apart to at least gap, staying within [lo, hi].
+
+    Positions that already respect the gap and the bounds are unchanged. Both
+    passes are cumulative max/min scans, so the whole thing is O(n).
+    """
+    steps = np.arange(len(y)) * gap
+    # Forward pass: y[i] >= y[i-1] + gap and y[i] >= lo + i * gap
+    up = steps + np.maximum.accumulate(np.maximum(y - steps, lo))
+    # Backward pass, run on the reversed array:
+    # y[i] <= y[i+1] - gap and y[i] <= hi - (m - 1 - i) * gap
+    down = np.minimum.accumulate(np.minimum(up[::-1] + steps, hi)) - steps
+    return down[::-1]
+
+
+def spread_labels(x, y, gap, priority, radius=None, pad=0., bounds=None):
+    """Move outside labels apart so they do not overlap.
+
+    Labels are split into the right (x >= 0) and left half of the chart and
+    sorted by height (O(n log n)); each half is then spread vertically to at
+    least gap apart. Every label afterwards slides back onto its ring,
+    x = +-sqrt(radius**2 - y**2) (radius defaults to its distance from the
+    centre), or onto the vertical axis beyond the top or bottom of the ring.
+    Labels drawn in a box with this pad (a scalar or one per label) are then
+    moved pad further out, so the box starts where the text would.
+
+    Labels are meant to be drawn with ha from side_alignment and va
+    'center'. Each one then stays in its own half, so the two halves cannot
+    run into each other where they meet at the top and bottom, and no part
+    of a label comes closer to the centre than radius - gap / 2.
+
+    When a half has more labels than fit between the bounds (default: the
+    largest radius plus half a gap), only the ones with the highest priority
+    are kept. Returns the new x and y positions and a mask of labels to show.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float).copy()
+    priority = np.asarray(priority, dtype=float)
+    if radius is None:
+        radius = np.hypot(x, y)
+    radius = np.broadcast_to(np.asarray(radius, dtype=float), y.shape)
+    if bounds is None:
+        bounds = radius.max(initial=0.) + gap / 2
+    visible = np.ones(len(y), dtype=bool)
+
+    right = x >= 0
+    for side in (right, ~right):
+        idx = np.flatnonzero(side)
+        capacity = int(2 * bounds // gap) + 1
+        if len(idx) > capacity:
+            # Keep the most important labels; argpartition is O(n)
+            keep = np.argpartition(-priority[idx], capacity - 1)[:capacity]
+            visible[np.delete(idx, keep)] = False
+            idx = idx[keep]
+        if len(idx) < 2:
+            continue
+        order = idx[np.argsort(y[idx], kind='stable')]
+        y[order] = _spread_1d(y[order], gap, -bounds, bounds)
+
+    x = np.where(right, 1., -1.) * (np.sqrt(np.maximum(radius**2 - y**2, 0.)) + pad)
+    return x, y, visible
+
+
+def ring_radius(radius, clearance, height):
+    """Smallest ring radius, at least radius, that keeps a spread label of
+    the given height clear of a disc of radius clearance (see spread_labels)
+    """
+    return np.maximum(radius, clearance + height / 2)
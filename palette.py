@@ -0,0 +1,115 @@
+"""Chart color palettes.
+
+A palette is either a matplotlib colormap, sampled at i / n like the charts
+always have been, or a fixed list of colors that repeats. get_palette()
+samples the whole palette in one vectorized call and memoizes the result
+per (palette, n, overrides), so previews and batch renders that ask for the
+same colors again skip the colormap work. Each Palette holds the colors as
+RGBA floats and as hex strings.
+
+Custom color overrides may be keyed by label name; overrides_by_index()
+turns them into the {index: color} form the renderers use.
+"""
+from functools import lru_cache
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.colors import to_rgba, to_rgba_array
+
+DEFAULT_PALETTE = 'tab20'
+
+# Fixed color lists; any other name is looked up as a matplotlib colormap
+PALETTES = {
+    'brand': ['#364FC7', '#F59F00', '#2B8A3E', '#E03131', '#7048E8',
+              '#1098AD', '#D6336C', '#5C940D', '#F76707', '#495057'],
+    'pastel': ['#A5D8FF', '#FFD8A8', '#B2F2BB', '#FFC9C9', '#D0BFFF',
+               '#99E9F2', '#FCC2D7', '#D8F5A2', '#FFEC99', '#DEE2E6'],
+}
+
+# Offered in the GUI, colormaps first
+PALETTE_NAMES = ('tab20', 'tab10', 'Set2', 'Set3', 'Pastel1', 'viridis') + tuple(PALETTES)
+
+
+class Palette:
+    """n colors as an (n, 4) RGBA float array and a tuple of '#rrggbb' strings"""
+
+    def __init__(self, rgba):
+        rgba.setflags(write=False)  # shared between callers through the cache
+        self.rgba = rgba
+        # Rounds like matplotlib.colors.to_hex, for the whole array at once
+        channels = np.round(rgba[:, :3] * 255).astype(int).tolist()
+        self.hex = tuple('#%02x%02x%02x' % tuple(c) for c in channels)
+
+    def __len__(self):
+        return len(self.rgba)
+
+
+def register_palette(name, colors):
+    """Add or replace a named list of colors"""
+    PALETTES[name] = list(colors)
+    _sample.cache_clear()
+    _palette.cache_clear()
+
+
+def is_palette(name):
+    return name in PALETTES or name in colormaps
+
+
+@lru_cache(maxsize=64)
+def _sample(name, n):
+    if name in PALETTES:
+        base = to_rgba_array(PALETTES[name])
+        rgba = base[np.arange(n) % len(base)]
+    elif name in colormaps:
+        rgba = colormaps[name](np.arange(n) / n)
+    else:
+        raise ValueError(f"Unknown palette '{name}'")
+    rgba.setflags(write=False)
+    return rgba
+
+
+@lru_cache(maxsize=256)
+def _palette(name, n, overrides):
+    rgba = _sample(name, n).copy()
+    for i, color in overrides:
+        if 0 <= i < n:
+            rgba[i] = to_rgba(color)
+    return Palette(rgba)
+
+
+def _hashable(color):
+    return color if isinstance(color, str) else tuple(float(c) for c in color)
+
+
+def get_palette(n, custom_colors=None, name=DEFAULT_PALETTE):
+    """Palette of n colors with custom_colors {index: color} overrides"""
+    overrides = tuple(sorted((int(i), _hashable(c)) for i, c in (custom_colors or {}).items()))
+    return _palette(name, n, overrides)
+
+
+def overrides_by_index(labels, custom_colors, other_label=None):
+    """Map custom_colors keyed by label name or index to {index: color}.
+
+    Integer keys are indices. String keys name a label (its first
+    occurrence); strings that are not a label but look like an integer are
+    indices too, as JSON can only carry string keys. A key equal to
+    other_label maps to -1, the "Other" slice. Names of labels that are not
+    in the chart are ignored, so one set of overrides can serve many charts.
+    """
+    index = {}
+    for i, label in enumerate(labels):
+        index.setdefault(label, i)
+    resolved = {}
+    for key, color in (custom_colors or {}).items():
+        if isinstance(key, (int, np.integer)):
+            resolved[int(key)] = color
+        elif key in index:
+            resolved[index[key]] = color
+        elif other_label is not None and key == other_label:
+            resolved[-1] = color
+        else:
+            try:
+                resolved[int(key)] = color
+            except ValueError:
+                pass
+    return resolved
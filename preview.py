@@ -0,0 +1,80 @@
+"""Live chart preview that redraws only what changed.
+
+LivePreview keeps one ChartFigure on a canvas and compares each new spec
+with the one it shows. Color changes, and percentage toggles on charts
+whose percentages all sit inside the slices, are applied to the existing
+artists and blitted over a cached background; new values, titles or a
+toggle of texts outside the chart (they take part in the layout) update
+the artists in place and redraw the figure;
+only a new chart type or category count rebuilds the chart. It works with
+any canvas that supports blitting, such as FigureCanvasTkAgg.
+"""
+from render import ChartFigure
+
+# Spec keys that can change without a new layout
+COLOR_KEYS = {'custom_colors', 'palette'}
+VISIBILITY_KEYS = {'show_percentages'}
+
+
+class LivePreview:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.chart = None
+        self.spec = None
+        self._background = None
+        self._animated = []
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def show(self, spec):
+        """Display a normalized spec, doing as little work as possible"""
+        prev, self.spec = self.spec, spec
+        chart = self.chart
+        if chart is None or chart.chart_type != spec['type'] or chart.n != len(spec['labels']):
+            self._rebuild(spec)
+            return
+
+        changed = {key for key, value in spec.items() if prev.get(key) != value}
+        if not changed:
+            return
+        if changed <= COLOR_KEYS | VISIBILITY_KEYS:
+            if changed & COLOR_KEYS:
+                chart.apply_colors(spec['custom_colors'], spec['palette'])
+            if (not changed & VISIBILITY_KEYS
+                    or chart.apply_visibility(prev['show_labels'], spec['show_percentages'])):
+                self._blit()
+                return
+
+        chart.update(spec)
+        self.canvas.draw_idle()
+
+    def _rebuild(self, spec):
+        self.fig.clf()
+        self.chart = ChartFigure(spec['type'], len(spec['labels']), self.fig)
+        self.chart.update(spec)
+        # Animated artists are left out of normal draws; _on_draw paints them
+        # over the saved background, which is what makes blitting possible
+        for artist in self._animated:
+            artist.set_animated(False)
+        self._animated = self.chart.data_artists()
+        for artist in self._animated:
+            artist.set_animated(True)
+        self._background = None
+        self.canvas.draw_idle()
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self._animated:
+            self.fig.draw_artist(artist)
+
+    def _blit(self):
+        if self._background is None:
+            # Nothing drawn yet to restore from
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
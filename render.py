@@ -0,0 +1,587 @@
+"""Headless chart rendering for Chart Designer.
+
+Everything in here works on plain chart specs and draws with the Agg
+backend, so it can run on machines without a display. Nothing in this
+module may import tkinter or matplotlib.pyplot.
+"""
+import io
+from collections import OrderedDict
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.patches import Circle
+import numpy as np
+
+from instrument import count, span
+from layout import (PIE_POINTS_PER_UNIT, POLAR_POINTS_PER_UNIT, SPREAD_MIN_CATEGORIES,
+                    box_radius, pie_layout, polar_layout, ring_radius, side_alignment,
+                    spread_labels, text_height, text_width)
+from palette import DEFAULT_PALETTE, get_palette, is_palette, overrides_by_index
+
+CHART_TYPES = ('pie', 'donut', 'radial', 'rose')
+
+# 'direct' skips matplotlib and writes SVG/PDF paths itself (see vector.py)
+RENDERERS = ('matplotlib', 'direct')
+VECTOR_FORMATS = ('svg', 'pdf')
+
+# Slice that small categories are folded into (see fold_small_slices)
+OTHER_LABEL = 'Other'
+OTHER_COLOR = '#B0B0B0'
+
+# Figure geometry used by the GUI since v1.0
+FIGSIZE = (7, 7)
+FIG_DPI = 130
+SAVE_DPI = 150
+
+# Limits that keep a single spec from exhausting a render process: a 7x7
+# inch figure at MAX_DPI is already 8400 pixels square
+MAX_DPI = 1200
+MAX_CATEGORIES = 10000
+
+# Consistent text properties for all charts
+LABEL_PROPS = {'fontsize': 14, 'weight': 'medium', 'color': '#222'}
+PCT_PROPS = {'fontsize': 12, 'weight': 'bold', 'color': 'white'}
+PCT_BBOX = dict(boxstyle='round,pad=0.3', fc='#364FC7', alpha=0.9, ec='none')
+TITLE_PROPS = {'fontsize': 22, 'fontweight': 'bold', 'color': '#1a1a1a', 'pad': 30}
+
+def get_colors(n, custom_colors=None, palette=DEFAULT_PALETTE):
+    """Return n RGBA colors from palette, with custom_colors {index: color} overrides"""
+    return [tuple(c) for c in get_palette(n, custom_colors, palette).rgba]
+
+
+def split_list(value):
+    """Split a comma-separated string into stripped, non-empty items"""
+    if isinstance(value, str):
+        return [x.strip() for x in value.strip().split(',') if x.strip()]
+    if isinstance(value, np.ndarray):
+        return value
+    return list(value)
+
+
+def fold_small_slices(labels, sizes, custom_colors=None, top_k=None, min_pct=None,
+                      other_label=OTHER_LABEL):
+    """Fold everything outside the top_k values or below min_pct into one slice.
+
+    The kept categories stay in their original order and the folded ones are
+    summed into a trailing "Other" slice. Selection uses argpartition, so it
+    is O(n) in the number of raw categories. custom_colors {index: color} is
+    re-indexed to match; "Other" is gray unless custom_colors[-1] is set.
+    Returns (labels, sizes, custom_colors). Nothing is folded when fewer than
+    two categories would go.
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    custom_colors = dict(custom_colors or {})
+    keep = np.ones(len(sizes), dtype=bool)
+    if min_pct is not None:
+        keep &= sizes / sizes.sum() * 100 >= min_pct
+    if top_k is not None and keep.sum() > top_k:
+        candidates = np.flatnonzero(keep)
+        top = np.argpartition(-sizes[candidates], top_k - 1)[:top_k]
+        keep[:] = False
+        keep[candidates[top]] = True
+    if len(sizes) - keep.sum() < 2:
+        return list(labels), sizes, custom_colors
+
+    kept = np.flatnonzero(keep)
+    new_index = {int(old): new for new, old in enumerate(kept)}
+    colors = {new_index[i]: c for i, c in custom_colors.items() if i in new_index}
+    colors[len(kept)] = custom_colors.get(-1, OTHER_COLOR)
+    return ([labels[i] for i in kept] + [other_label],
+            np.append(sizes[kept], sizes[~keep].sum()),
+            colors)
+
+
+def normalize_spec(spec):
+    """Validate a chart spec and fill in defaults.
+
+    Optional keys top_k, min_pct and other_label fold small categories into
+    an "Other" slice (see fold_small_slices). custom_colors may be keyed by
+    label name or index and come back keyed by index; palette names a
+    palette from palette.py. renderer='direct' selects the
+    matplotlib-free SVG/PDF renderer in vector.py. format must be one
+    matplotlib can save; dpi and the number of categories left after
+    folding are capped at MAX_DPI and MAX_CATEGORIES. Raises ValueError
+    with a user-facing message when the spec is unusable.
+    """
+    chart_type = spec.get('type', 'pie')
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type '{chart_type}'. "
+                         f"Expected one of: {', '.join(CHART_TYPES)}")
+
+    renderer, fmt = spec.get('renderer', 'matplotlib'), str(spec.get('format', 'png')).lower()
+    if fmt not in FigureCanvasAgg.get_supported_filetypes():
+        raise ValueError(f"Unknown output format '{fmt}'")
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{renderer}'. "
+                         f"Expected one of: {', '.join(RENDERERS)}")
+    if renderer == 'direct' and fmt not in VECTOR_FORMATS:
+        raise ValueError(f"The direct renderer only writes {' and '.join(VECTOR_FORMATS)}, "
+                         f"not '{fmt}'")
+
+    labels = [str(x) for x in split_list(spec.get('labels', []))]
+    try:
+        sizes = np.asarray(split_list(spec.get('sizes', [])), dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Values must be numbers, comma-separated (e.g. 10,20,30)")
+
+    if not labels or not sizes.size:
+        raise ValueError("Labels and values must not be empty")
+    if len(labels) != len(sizes):
+        raise ValueError(
+            f"Labels and values must have the same number of items.\n"
+            f"Labels: {len(labels)}, Values: {len(sizes)}"
+        )
+    if not np.isfinite(sizes).all():
+        raise ValueError("Values must be finite numbers (no NaN or infinity)")
+    if sizes.min() < 0:
+        raise ValueError("Values must not be negative")
+    if sizes.sum() <= 0:
+        raise ValueError("Values must add up to more than zero")
+
+    try:
+        dpi = float(spec.get('dpi', SAVE_DPI))
+    except (TypeError, ValueError):
+        raise ValueError("dpi must be a number")
+    if not 0 < dpi <= MAX_DPI:
+        raise ValueError(f"dpi must be greater than 0 and at most {MAX_DPI}")
+
+    palette = spec.get('palette', DEFAULT_PALETTE)
+    if not is_palette(palette):
+        raise ValueError(f"Unknown palette '{palette}'")
+    if not isinstance(spec.get('custom_colors') or {}, dict):
+        raise ValueError("custom_colors must map labels or indices to colors")
+    other_label = spec.get('other_label', OTHER_LABEL)
+    custom_colors = overrides_by_index(labels, spec.get('custom_colors'), other_label)
+
+    # Small categories are folded before rendering; the result no longer
+    # carries top_k/min_pct, so normalizing it again is a no-op
+    top_k, min_pct = spec.get('top_k'), spec.get('min_pct')
+    if top_k is not None or min_pct is not None:
+        if top_k is not None and int(top_k) < 1:
+            raise ValueError("top_k must be at least 1")
+        labels, sizes, custom_colors = fold_small_slices(
+            labels, sizes, custom_colors,
+            None if top_k is None else int(top_k),
+            None if min_pct is None else float(min_pct),
+            other_label)
+    if len(labels) > MAX_CATEGORIES:
+        raise ValueError(f"Charts can have at most {MAX_CATEGORIES} categories, not {len(labels)}; "
+                         f"use top_k or min_pct to fold the small ones")
+
+    return {
+        'type': chart_type,
+        'title': str(spec.get('title', '')).strip(),
+        'labels': labels,
+        'sizes': sizes.tolist(),
+        'custom_colors': custom_colors,
+        'palette': palette,
+        'show_title': bool(spec.get('show_title', True)),
+        'show_labels': bool(spec.get('show_labels', True)),
+        'show_percentages': bool(spec.get('show_percentages', True)),
+        'dpi': dpi,
+        'format': fmt,
+        'renderer': renderer,
+    }
+
+
+class ChartFigure:
+    """A figure with every artist for one chart type and category count.
+
+    The artists are created once with placeholder data; update() then applies
+    a spec to them in place (geometry, colors, texts, visibility). A
+    ChartFigure can therefore render any number of specs that share its
+    chart type and number of categories without rebuilding anything.
+    subplot is the (rows, columns, index) cell of fig to draw into; sheets
+    of several charts share one figure this way (see sheet.py).
+    """
+
+    def __init__(self, chart_type, n, fig=None, subplot=(1, 1, 1)):
+        self.chart_type = chart_type
+        self.n = n
+        self.fig = fig if fig is not None else new_figure()
+        self.subplot = subplot
+        self.label_texts = []
+        self.pct_texts = []
+        self.extra_patches = []
+
+        with span('axes'):
+            if chart_type in ('pie', 'donut'):
+                self._build_pie(donut=chart_type == 'donut')
+            else:
+                self._build_polar(rose=chart_type == 'rose')
+
+    def _pct_text(self, **kwargs):
+        return self.ax.text(0, 0, '', ha='center', va='center',
+                            color=PCT_PROPS['color'], bbox=PCT_BBOX, **kwargs)
+
+    def _build_pie(self, donut):
+        ax = self.ax = self.fig.add_subplot(*self.subplot)
+        n = self.n
+
+        if donut:
+            wedgeprops = dict(width=0.5, edgecolor='#FAFAFA', linewidth=3, alpha=0.95, antialiased=True)
+        else:
+            wedgeprops = dict(edgecolor='#FAFAFA', linewidth=3, alpha=0.92, antialiased=True)
+
+        # Percentages are handled manually, so no autopct texts are needed
+        wedges, texts = ax.pie(
+            np.ones(n), labels=[''] * n, startangle=90,
+            wedgeprops=wedgeprops,
+            textprops=LABEL_PROPS,
+            labeldistance=1.15
+        )
+        self.patches = list(wedges)
+        self.label_texts = list(texts)
+        if donut:
+            centre_circle = Circle((0, 0), 0.50, fc='white', lw=0)
+            ax.add_artist(centre_circle)
+            self.extra_patches.append(centre_circle)
+
+        self.pct_texts = [self._pct_text(weight=PCT_PROPS['weight']) for _ in range(n)]
+        ax.axis('equal')
+
+    def _build_polar(self, rose):
+        ax = self.ax = self.fig.add_subplot(*self.subplot, polar=True)
+        n = self.n
+        self.angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+        if rose:
+            width, edgecolor = 2 * np.pi / n, '#FAFAFA'
+        else:
+            width, edgecolor = 2 * np.pi / n * 0.7, '#FFFFFF'
+        bars = ax.bar(
+            self.angles, np.ones(n), width=width, bottom=0.0,
+            edgecolor=edgecolor, linewidth=2, alpha=0.92
+        )
+        self.patches = list(bars)
+
+        self.pct_texts = [self._pct_text(fontweight=PCT_PROPS['weight']) for _ in range(n)]
+        # Aligned by update(), which spreads the labels of big charts
+        self.label_texts = [ax.text(angle, 0, '', rotation=0, **LABEL_PROPS) for angle in self.angles]
+
+        # No ticks at all rather than empty tick labels: identical output,
+        # but layout no longer has to measure a dozen invisible texts
+        ax.set_yticks([])
+        ax.set_xticks([])
+        ax.spines['polar'].set_visible(False)
+        ax.grid(False)
+        if rose:
+            ax.set_axisbelow(True)
+        ax.set_frame_on(False)
+
+    def update(self, spec, layout=True, scale=None):
+        """Apply a normalized spec with self.n categories to the artists.
+
+        With layout=False the figure margins are left alone, for callers
+        that lay out several charts in one figure at once. scale (sizes)
+        fixes the radial scale and label ring of polar charts instead of
+        fitting them to spec's sizes, so frames of an animation share them.
+        """
+        sizes = np.asarray(spec['sizes'], dtype=float)
+        with span('colors'):
+            self.apply_colors(spec['custom_colors'], spec['palette'])
+        show_labels, show_percentages = spec['show_labels'], spec['show_percentages']
+
+        with span('text_layout'):
+            lay, label_xy, pct_xy, self._label_shown, self._pct_shown = place_texts(
+                self.chart_type, sizes, show_labels, show_percentages, scale)
+            if self.chart_type in ('pie', 'donut'):
+                self._update_pie(lay)
+            else:
+                self._update_polar(sizes, lay)
+            # Which groups the margins and collision pass (if any) were
+            # computed for; outside percentages count like labels
+            self._laid_out_for = (show_labels, show_percentages)
+            self._pct_outside = ~lay['pct_internal']
+
+            for text, label, xy in zip(self.label_texts, spec['labels'], label_xy):
+                text.set_text(label)
+                text.set_position(xy)
+            for text, pct, xy, fontsize in zip(self.pct_texts, lay['percentages'], pct_xy,
+                                               lay['pct_fontsize']):
+                text.set_text(f'{pct:.1f}%')
+                text.set_position(xy)
+                text.set_fontsize(fontsize)
+            self.apply_visibility(show_labels, show_percentages)
+
+            self.ax.set_title(spec['title'] if spec['show_title'] else '', **TITLE_PROPS)
+
+        if not layout:
+            return
+        with span('tight_layout'):
+            # tight_layout starts from the default margins on a fresh figure, so
+            # reset them first to lay a reused figure out exactly the same way
+            self.fig.subplots_adjust(**{k: matplotlib.rcParams[f'figure.subplot.{k}']
+                                        for k in ('left', 'right', 'bottom', 'top')})
+            self.fig.tight_layout()
+
+    def apply_colors(self, custom_colors, palette=DEFAULT_PALETTE):
+        """Recolor the wedges or bars without touching anything else"""
+        for patch, color in zip(self.patches, get_palette(self.n, custom_colors, palette).rgba):
+            patch.set_facecolor(color)
+
+    def apply_visibility(self, show_labels, show_percentages):
+        """Show or hide label and percentage texts without a new layout.
+
+        Returns False, changing nothing, when the new flags need a layout the
+        last update() did not do: labels and outside percentages reach past
+        the axes, so tight_layout fits the margins to them, and big charts
+        only spread the groups that were shown. Call update() instead.
+        """
+        laid_labels, laid_percentages = self._laid_out_for
+        if show_labels != laid_labels or (show_percentages != laid_percentages
+                                          and (self._pct_outside & self._pct_shown).any()):
+            return False
+        for text, shown in zip(self.label_texts, self._label_shown):
+            text.set_visible(show_labels and shown)
+        for text, shown in zip(self.pct_texts, self._pct_shown):
+            text.set_visible(show_percentages and shown)
+        return True
+
+    def data_artists(self):
+        """Every artist update() may change, in draw order"""
+        artists = self.patches + self.extra_patches + self.label_texts + self.pct_texts
+        return sorted(artists, key=lambda a: a.get_zorder())
+
+    def _update_pie(self, lay):
+        for wedge, theta1, theta2 in zip(self.patches, lay['theta1'], lay['theta2']):
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+        self._align_texts(lay)
+
+        # Data limits drive the 'equal' aspect, so refresh them from the wedges
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+    def _update_polar(self, sizes, lay):
+        for bar, size in zip(self.patches, sizes):
+            bar.set_height(size)
+        self.ax.set_ylim(0, lay['ylim'])  # Dynamic spacing
+        self._align_texts(lay)
+
+    def _align_texts(self, lay):
+        # Spread labels are aligned by side, so a reused figure resets them
+        for text, ha, va in zip(self.label_texts, lay['label_ha'], lay['label_va']):
+            text.set_horizontalalignment(ha)
+            text.set_verticalalignment(va)
+        for text, ha in zip(self.pct_texts, lay['pct_ha']):
+            text.set_horizontalalignment(ha)
+
+
+def place_texts(chart_type, sizes, show_labels, show_percentages, scale=None):
+    """Layout of one chart plus the final label and percentage anchors.
+
+    Returns (lay, label_xy, pct_xy, label_shown, pct_shown): the pie_layout
+    or polar_layout dict, with label_ha, label_va and pct_ha set for the
+    final anchors, (n, 2) anchors in data coordinates ((theta, r) for
+    polar charts) and masks of the texts left visible by the collision pass
+    that charts with many categories get. scale is passed on to
+    polar_layout.
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    if chart_type in ('pie', 'donut'):
+        internal_radius = 0.75 if chart_type == 'donut' else 0.7
+        lay = pie_layout(sizes, internal_radius, pct_fontsize=PCT_PROPS['fontsize'])
+        return (lay,) + _place_pie_texts(sizes, lay, show_labels, show_percentages)
+    lay = polar_layout(sizes, rose=chart_type == 'rose', pct_fontsize=PCT_PROPS['fontsize'],
+                       scale=scale)
+    return (lay,) + _place_polar_texts(sizes, lay, show_labels, show_percentages)
+
+
+def _place_pie_texts(sizes, lay, show_labels, show_percentages):
+    n = len(sizes)
+    label_xy = np.column_stack((lay['label_x'], lay['label_y']))
+    pct_xy = np.column_stack((lay['pct_x'], lay['pct_y']))
+    label_shown = pct_shown = np.ones(n, dtype=bool)
+    lay['label_va'] = np.full(n, 'center')
+    lay['pct_ha'] = np.full(n, 'center')
+    internal = lay['pct_internal'] & show_percentages
+    external = ~lay['pct_internal'] & show_percentages
+    if n >= SPREAD_MIN_CATEGORIES and (show_labels or external.any()):
+        # Outside percentages sit on the label ring, so both are spread
+        # together as one set of rows, clear of the pie and of the
+        # percentage boxes inside it
+        labels = np.full(n, show_labels)
+        label_h = text_height(LABEL_PROPS['fontsize']) / PIE_POINTS_PER_UNIT
+        pct_h = text_height(PCT_PROPS['fontsize'] - 1, pad=0.3) / PIE_POINTS_PER_UNIT
+        clearance = max(1., _inside_pct_reach(lay, internal, lay['pct_x'], lay['pct_y'],
+                                              PIE_POINTS_PER_UNIT))
+        radius = np.concatenate((
+            ring_radius(np.hypot(lay['label_x'], lay['label_y'])[labels], clearance, label_h),
+            ring_radius(np.hypot(lay['pct_x'], lay['pct_y'])[external], clearance, pct_h)))
+        side = np.concatenate((lay['label_x'][labels], lay['pct_x'][external]))
+        # Keeps the halves apart where they meet, and is the percentages' box pad
+        pad = 0.3 * np.repeat((LABEL_PROPS['fontsize'], PCT_PROPS['fontsize'] - 1),
+                              (labels.sum(), external.sum())) / PIE_POINTS_PER_UNIT
+        x, y, shown = spread_labels(
+            side, np.concatenate((lay['label_y'][labels], lay['pct_y'][external])),
+            max(label_h if show_labels else 0, pct_h),
+            np.concatenate((sizes[labels], sizes[external])), radius, pad)
+        label_shown, pct_shown = _apply_spread(lay, labels, external, side, x, y, shown,
+                                               label_xy, pct_xy)
+
+    return label_xy, pct_xy, label_shown, pct_shown
+
+
+def _place_polar_texts(sizes, lay, show_labels, show_percentages):
+    n = len(sizes)
+    angles, ylim = lay['angles'], lay['ylim']
+    label_xy = np.column_stack((angles, lay['label_r']))
+    pct_xy = np.column_stack((angles, lay['pct_r']))
+    label_shown = pct_shown = np.ones(n, dtype=bool)
+    lay['pct_ha'] = np.full(n, 'center')
+    internal = lay['pct_internal'] & show_percentages
+    external = ~lay['pct_internal'] & show_percentages
+    if n >= SPREAD_MIN_CATEGORIES and (show_labels or external.any()):
+        # As on pies, labels and the percentages of small bars go on a ring
+        # around the bars and the percentage boxes inside them, and are
+        # spread together. Cartesian units where 1 is the outer edge of the axes
+        labels = np.full(n, show_labels)
+        label_h = text_height(LABEL_PROPS['fontsize']) / POLAR_POINTS_PER_UNIT
+        pct_h = text_height(PCT_PROPS['fontsize'] - 1, pad=0.3) / POLAR_POINTS_PER_UNIT
+        pct_r = lay['pct_r'] / ylim
+        clearance = max(sizes.max() / ylim, _inside_pct_reach(
+            lay, internal, pct_r * np.cos(angles), pct_r * np.sin(angles), POLAR_POINTS_PER_UNIT))
+        radius = np.concatenate((
+            ring_radius(lay['label_r'][labels] / ylim, clearance, label_h),
+            np.full(external.sum(), ring_radius(0., clearance, pct_h))))
+        theta = np.concatenate((angles[labels], angles[external]))
+        side = radius * np.cos(theta)
+        # Keeps the halves apart where they meet, and is the percentages' box pad
+        pad = 0.3 * np.repeat((LABEL_PROPS['fontsize'], PCT_PROPS['fontsize'] - 1),
+                              (labels.sum(), external.sum())) / POLAR_POINTS_PER_UNIT
+        x, y, shown = spread_labels(
+            side, radius * np.sin(theta), max(label_h if show_labels else 0, pct_h),
+            np.concatenate((sizes[labels], sizes[external])), radius, pad)
+        label_shown, pct_shown = _apply_spread(
+            lay, labels, external, side, np.arctan2(y, x) % (2 * np.pi), np.hypot(x, y) * ylim,
+            shown, label_xy, pct_xy)
+
+    return label_xy, pct_xy, label_shown, pct_shown
+
+
+def _inside_pct_reach(lay, inside, x, y, points_per_unit):
+    """How far from the centre the boxes of the inside percentages reach"""
+    fontsize = lay['pct_fontsize'][inside]
+    # '12.3%': the integer digits plus three characters
+    chars = np.floor(np.log10(np.maximum(lay['percentages'][inside], 1))) + 4
+    return box_radius(x[inside], y[inside], text_width(chars, fontsize, pad=0.3) / points_per_unit,
+                      text_height(fontsize, pad=0.3) / points_per_unit).max(initial=0.)
+
+
+def _apply_spread(lay, labels, external, side, a, b, shown, label_xy, pct_xy):
+    """Write spread_labels' result for the labels, then the outside
+    percentages, back into the anchors and alignments; returns the masks.
+
+    side is the x spread_labels was given: labels moved onto the vertical
+    axis keep the alignment of the half they came from.
+    """
+    k = labels.sum()
+    label_xy[labels] = np.column_stack((a[:k], b[:k]))
+    pct_xy[external] = np.column_stack((a[k:], b[k:]))
+    lay['label_ha'] = lay['label_ha'].copy()
+    lay['label_ha'][labels] = side_alignment(side[:k])
+    lay['label_va'] = np.full(len(labels), 'center')
+    lay['pct_ha'][external] = side_alignment(side[k:])
+    label_shown = np.ones(len(labels), dtype=bool)
+    pct_shown = label_shown.copy()
+    label_shown[labels], pct_shown[external] = shown[:k], shown[k:]
+    return label_shown, pct_shown
+
+
+def draw_chart(fig, spec):
+    """Draw a normalized spec onto an empty figure and return the axes"""
+    chart = ChartFigure(spec['type'], len(spec['labels']), fig)
+    chart.update(spec)
+    return chart.ax
+
+
+def new_figure():
+    """Create a standalone Agg figure that is not tracked by pyplot"""
+    fig = Figure(figsize=FIGSIZE, dpi=FIG_DPI)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+class FigurePool:
+    """Reuses built ChartFigures across renders.
+
+    Figures are keyed by (chart type, number of categories) and kept in
+    least-recently-used order, at most max_figures of them. Not thread-safe;
+    use one pool per thread or process.
+    """
+
+    def __init__(self, max_figures=8):
+        self.max_figures = max_figures
+        self._figures = OrderedDict()
+
+    def get(self, chart_type, n):
+        key = (chart_type, n)
+        chart = self._figures.pop(key, None)
+        if chart is None:
+            chart = ChartFigure(chart_type, n)
+        self._figures[key] = chart
+        while len(self._figures) > self.max_figures:
+            self._figures.popitem(last=False)
+        return chart
+
+    def clear(self):
+        self._figures.clear()
+
+
+def encode_figure(fig, fmt='png', dpi=SAVE_DPI, tight=True):
+    """Save a figure the way exports always have and return the bytes
+
+    tight=False skips bbox_inches='tight', which draws the figure twice,
+    for figures whose layout already fills the canvas.
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, bbox_inches='tight' if tight else None, dpi=dpi,
+                transparent=True)
+    return buf.getvalue()
+
+
+def render_chart(spec, pool=None):
+    """Render a chart spec and return the encoded image bytes.
+
+    Pass a FigurePool to reuse figures between calls instead of building a
+    new one for every chart. Specs with renderer='direct' bypass matplotlib
+    (and the pool) entirely, unless their text needs matplotlib's fonts.
+    """
+    with span('parse'):
+        spec = normalize_spec(spec)
+    n = len(spec['labels'])
+    if spec['renderer'] == 'direct':
+        # Imported here because vector.py builds on this module
+        from vector import supports
+        if not supports(spec):
+            count('direct_fallback', chart_type=spec['type'], format=spec['format'])
+            spec['renderer'] = 'matplotlib'
+    with span('render', chart_type=spec['type'], format=spec['format'],
+              renderer=spec['renderer'], categories=n):
+        if spec['renderer'] == 'direct':
+            from vector import render_vector
+            data = render_vector(spec)
+        else:
+            if pool is not None:
+                chart = pool.get(spec['type'], n)
+            else:
+                chart = ChartFigure(spec['type'], n)
+            chart.update(spec)
+            count('text_artists', len(chart.label_texts) + len(chart.pct_texts),
+                  chart_type=spec['type'])
+            with span('savefig'):
+                data = encode_figure(chart.fig, spec['format'], spec['dpi'])
+    count('output_bytes', len(data), chart_type=spec['type'], format=spec['format'])
+    return data
+
+
+def init_worker(pool=None):
+    """Set up matplotlib in a fresh render process (e.g. a Pool initializer).
+
+    Selects Agg and renders a tiny chart so that the font cache and the
+    first-draw costs are paid before the first real job. Pass the process's
+    FigurePool to also warm that up.
+    """
+    matplotlib.use('Agg')
+    render_chart({'type': 'pie', 'labels': 'warm up', 'sizes': '1'}, pool=pool)
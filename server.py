@@ -0,0 +1,264 @@
+"""Local HTTP render service for other tools.
+
+Usage:
+    python server.py --port 8765 --workers 4
+
+POST a chart spec as JSON to /render and get the image back (the spec's
+"format" picks PNG, SVG or PDF):
+
+    curl -d '{"type": "pie", "labels": "a,b", "sizes": "1,2"}' \\
+        http://127.0.0.1:8765/render -o chart.png
+
+Renders run in a pool of warm worker processes (see render.init_worker).
+Identical specs that are already being rendered share one render instead
+of queueing again, and once --max-pending different renders are waiting,
+new ones get 503 with Retry-After so callers back off instead of piling up.
+GET /stats returns request counts and latency percentiles as JSON,
+GET /metrics the same counters in Prometheus text format.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cache import spec_key
+from instrument import PrometheusSink, add_sink, count, remove_sink, span
+from render import FigurePool, init_worker, normalize_spec, render_chart
+
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml', 'pdf': 'application/pdf'}
+MAX_BODY_BYTES = 10 * 1024 * 1024
+RENDER_TIMEOUT = 60.
+# Latency percentiles and throughput are computed over this many requests
+STATS_WINDOW = 1000
+THROUGHPUT_SECONDS = 10.
+
+log = logging.getLogger('chart_designer.server')
+
+# Each pool worker reuses its own figures
+_figure_pool = FigurePool()
+
+
+class Overloaded(Exception):
+    """Too many different renders are already waiting"""
+
+
+def _init_worker():
+    init_worker(_figure_pool)
+
+
+def _render(spec):
+    # Runs in a pool worker
+    return render_chart(spec, pool=_figure_pool)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+
+class RenderService:
+    """Renders specs in a process pool, coalescing identical requests.
+
+    At most max_pending distinct renders are queued or running at once;
+    submit() raises Overloaded beyond that. Safe to use from many threads.
+    """
+
+    def __init__(self, workers=None, max_pending=64):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._pool = multiprocessing.Pool(self.workers, initializer=_init_worker)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._latencies = deque(maxlen=STATS_WINDOW)
+        self._finished = deque(maxlen=STATS_WINDOW)
+        self.started = time.time()
+        self.stats = {'requests': 0, 'rendered': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+
+    def submit(self, spec):
+        """Start rendering spec (or join an identical render) and return a Future.
+
+        Raises ValueError for an invalid spec and Overloaded when the queue
+        is full.
+        """
+        spec = normalize_spec(spec)
+        key = spec_key(spec)
+        with self._lock:
+            self.stats['requests'] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                count('coalesced')
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.stats['rejected'] += 1
+                count('rejected')
+                raise Overloaded(f"{len(self._inflight)} renders pending")
+            future = self._inflight[key] = Future()
+
+        def done(data):
+            with self._lock:
+                del self._inflight[key]
+                self.stats['rendered'] += 1
+            future.set_result(data)
+
+        def failed(error):
+            with self._lock:
+                del self._inflight[key]
+                self.stats['errors'] += 1
+            future.set_exception(error)
+
+        self._pool.apply_async(_render, (spec,), callback=done, error_callback=failed)
+        return future
+
+    def render(self, spec, timeout=RENDER_TIMEOUT):
+        """Render spec and return the image bytes, blocking until done"""
+        start = time.perf_counter()
+        data = self.submit(spec).result(timeout)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._finished.append(time.monotonic())
+        return data
+
+    def snapshot(self):
+        """Counters, queue depth, latency percentiles (ms) and recent throughput"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            finished = list(self._finished)
+            stats = dict(self.stats, pending=len(self._inflight))
+        now = time.monotonic()
+        recent = sum(1 for t in finished if now - t <= THROUGHPUT_SECONDS)
+        stats.update({
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'throughput_per_second': round(recent / THROUGHPUT_SECONDS, 2),
+        })
+        for pct in (50, 90, 99):
+            value = percentile(latencies, pct)
+            stats[f'p{pct}_ms'] = None if value is None else round(value * 1000, 2)
+        return stats
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    server_version = 'ChartDesigner/1.0'
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send(200, json.dumps(self.server.service.snapshot()).encode(), 'application/json')
+        elif self.path == '/metrics':
+            self._send(200, self.server.metrics.render_text().encode(), 'text/plain; version=0.0.4')
+        elif self.path == '/health':
+            self._send(200, b'ok\n', 'text/plain')
+        else:
+            self._error(404, "Not found")
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._error(404, "Not found")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # rfile.read(-1) would block until the client closes the connection
+            self._error(400, "Invalid Content-Length")
+            return
+        if length > MAX_BODY_BYTES:
+            self._error(413, "Spec too large")
+            return
+        try:
+            spec = json.loads(self.rfile.read(length) or b'null')
+            if not isinstance(spec, dict):
+                raise ValueError("Body must be a JSON chart spec object")
+            # Normalized first so metrics are only labelled with valid formats
+            spec = normalize_spec(spec)
+            fmt = spec['format']
+            with span('request', format=fmt):
+                data = self.server.service.render(spec)
+        except (ValueError, TypeError) as e:
+            # json.JSONDecodeError is a ValueError too
+            self._error(400, str(e))
+        except Overloaded:
+            self._error(503, "Render queue is full, retry later", {'Retry-After': '1'})
+        except TimeoutError:
+            self._error(504, "Render timed out")
+        except Exception as e:
+            log.exception("Render failed")
+            self._error(500, f"Render failed: {e}")
+        else:
+            self._send(200, data, CONTENT_TYPES.get(fmt, 'application/octet-stream'))
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message, headers=None):
+        body = json.dumps({'error': message}).encode()
+        self._send(status, body, 'application/json', headers)
+
+    def log_message(self, format, *args):
+        log.info("%s %s", self.address_string(), format % args)
+
+
+def make_server(host='127.0.0.1', port=8765, workers=None, max_pending=64):
+    """An HTTP server with a started RenderService; call serve_forever()"""
+    server = ThreadingHTTPServer((host, port), RenderHandler)
+    server.daemon_threads = True
+    server.service = RenderService(workers, max_pending)
+    server.metrics = add_sink(PrometheusSink())
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve chart renders over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-j', '--workers', type=int, default=0,
+                        help="number of render processes (0 = one per CPU)")
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help="distinct renders allowed to wait before answering 503")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s %(message)s')
+
+    server = make_server(args.host, args.port, args.workers or None, args.max_pending)
+    print(f"Serving charts on http://{args.host}:{server.server_port} "
+          f"with {server.service.workers} workers", flush=True)
+    # Shut the worker pool down cleanly when a process manager stops us too
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+        remove_sink(server.metrics)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Small-multiples sheets: many charts in one figure.
+
+render_sheet draws a list of chart specs as the cells of a single figure
+and lays out and encodes that figure once, instead of building, laying out
+and saving one figure per chart and stitching the images afterwards. Cells
+default to the size of a single exported chart, so every chart looks the
+same as on its own.
+
+    png = render_sheet([{'type': 'pie', 'title': region, 'labels': labels,
+                         'sizes': totals[region]} for region in regions])
+"""
+import math
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from instrument import count, span
+from render import FIG_DPI, FIGSIZE, SAVE_DPI, TITLE_PROPS, ChartFigure, encode_figure, normalize_spec
+
+SHEET_TITLE_PROPS = {'fontsize': 30, 'fontweight': 'bold', 'color': TITLE_PROPS['color']}
+
+
+def sheet_shape(count, columns=None):
+    """(rows, columns) of the grid for count charts; square-ish by default"""
+    columns = columns or math.ceil(math.sqrt(count))
+    return math.ceil(count / columns), columns
+
+
+def draw_sheet(fig, specs, columns=None, title=None):
+    """Draw normalized specs into the cells of fig and lay it out once"""
+    rows, columns = sheet_shape(len(specs), columns)
+    charts = []
+    for i, spec in enumerate(specs):
+        chart = ChartFigure(spec['type'], len(spec['labels']), fig, subplot=(rows, columns, i + 1))
+        chart.update(spec, layout=False)
+        charts.append(chart)
+    if title:
+        fig.suptitle(title, **SHEET_TITLE_PROPS)
+    with span('tight_layout'):
+        fig.tight_layout()
+    return charts
+
+
+def render_sheet(specs, columns=None, title=None, fmt='png', dpi=SAVE_DPI, cell_size=FIGSIZE):
+    """Render chart specs as one sheet and return the encoded image bytes.
+
+    columns defaults to a square-ish grid; cell_size is the size of one
+    chart in inches. Each spec keeps its own type, colors and show flags;
+    their format and dpi are ignored in favour of fmt and dpi.
+    """
+    if not specs:
+        raise ValueError("A sheet needs at least one chart")
+    with span('parse'):
+        specs = [normalize_spec(spec) for spec in specs]
+    rows, columns = sheet_shape(len(specs), columns)
+    with span('sheet', format=fmt, charts=len(specs)):
+        fig = Figure(figsize=(columns * cell_size[0], rows * cell_size[1]), dpi=FIG_DPI)
+        FigureCanvasAgg(fig)
+        draw_sheet(fig, specs, columns, title)
+        with span('savefig'):
+            # tight_layout already fit the cells to the figure, so skip the
+            # second draw that bbox_inches='tight' would cost
+            data = encode_figure(fig, fmt, dpi, tight=False)
+    count('output_bytes', len(data), chart_type='sheet', format=fmt)
+    return data
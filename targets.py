@@ -0,0 +1,203 @@
+"""Export one chart at several sizes and formats from a single layout.
+
+A chart's layout (wedge geometry, label placement, tight_layout margins)
+is in inches and points, so it does not depend on the output resolution.
+render_targets lays a spec out and measures its tight bounding box once,
+then rasterizes the figure once per distinct DPI; every PNG and WebP target
+at that DPI is encoded from the same pixels, and SVG/PDF targets are saved
+from the same figure. Large images are encoded on a thread pool while the
+next size is drawn (Pillow's encoders release the GIL).
+
+    files = render_targets(spec, ['thumbnail', 'retina', 'print',
+                                  {'format': 'png', 'width': 1200, 'colors': 64}])
+    files['thumbnail']  # PNG bytes
+
+A target is a preset name (see PRESETS) or a dict with:
+    format          png, webp, svg or pdf (default png)
+    dpi or width    resolution, or the output width in pixels (default SAVE_DPI)
+    name            its key in the result (default e.g. 'png-300dpi')
+    compress_level  PNG zlib level 0-9; lower encodes faster but bigger (default 6)
+    colors          quantize a PNG/WebP to this many colors (2-256); flat
+                    charts rarely need more than 64 and shrink several times
+    quality         WebP quality 1-100 (default 90), or lossless=True
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+import numpy as np
+from PIL import Image
+
+from instrument import count, span
+from render import SAVE_DPI, ChartFigure, normalize_spec
+
+TARGET_FORMATS = ('png', 'webp', 'svg', 'pdf')
+RASTER_FORMATS = ('png', 'webp')
+
+PRESETS = {
+    'thumbnail': {'format': 'png', 'width': 256, 'compress_level': 9, 'colors': 64},
+    'web': {'format': 'webp', 'dpi': SAVE_DPI},
+    'retina': {'format': 'png', 'dpi': 2 * SAVE_DPI},
+    # Vector, so it prints sharply at any size
+    'print': {'format': 'pdf', 'dpi': 300},
+}
+
+# Rasters with at least this many pixels are encoded on the thread pool;
+# smaller ones encode faster than a thread hand-off
+PARALLEL_PIXELS = 1000000
+ENCODE_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def normalize_target(target):
+    """Validate a target (preset name or dict) and fill in its defaults"""
+    if isinstance(target, str):
+        if target not in PRESETS:
+            raise ValueError(f"Unknown export target '{target}'. "
+                             f"Choose from: {', '.join(PRESETS)}")
+        target = dict(PRESETS[target], name=target)
+    fmt = str(target.get('format', 'png')).lower()
+    if fmt not in TARGET_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(TARGET_FORMATS)}")
+    if 'dpi' in target and 'width' in target:
+        raise ValueError("Give a target's dpi or its width, not both")
+
+    out = {'format': fmt, 'dpi': float(target.get('dpi', SAVE_DPI)), 'width': None,
+           'compress_level': 6, 'colors': None, 'quality': 90, 'lossless': False}
+    if out['dpi'] <= 0:
+        raise ValueError("dpi must be greater than zero")
+    if 'width' in target:
+        out['width'] = int(target['width'])
+        if out['width'] < 1:
+            raise ValueError("width must be at least 1 pixel")
+
+    options = {'compress_level': ('png',), 'colors': RASTER_FORMATS,
+               'quality': ('webp',), 'lossless': ('webp',)}
+    for key, formats in options.items():
+        if key in target:
+            if fmt not in formats:
+                raise ValueError(f"{key} only applies to {' and '.join(formats)} targets")
+            out[key] = target[key]
+    out['compress_level'] = int(out['compress_level'])
+    if not 0 <= out['compress_level'] <= 9:
+        raise ValueError("compress_level must be between 0 and 9")
+    if out['colors'] is not None:
+        out['colors'] = int(out['colors'])
+        if not 2 <= out['colors'] <= 256:
+            raise ValueError("colors must be between 2 and 256")
+    out['quality'] = int(out['quality'])
+    if not 1 <= out['quality'] <= 100:
+        raise ValueError("quality must be between 1 and 100")
+    out['lossless'] = bool(out['lossless'])
+
+    if 'name' in target:
+        out['name'] = str(target['name'])
+    elif fmt not in RASTER_FORMATS:
+        out['name'] = fmt
+    elif out['width'] is not None:
+        out['name'] = f"{fmt}-{out['width']}px"
+    else:
+        out['name'] = f"{fmt}-{out['dpi']:g}dpi"
+    return out
+
+
+def target_paths(path, targets):
+    """{target name: file path}, each target saved as <path stem>-<name>.<format>"""
+    stem = os.path.splitext(path)[0]
+    return {t['name']: f"{stem}-{t['name']}.{t['format']}"
+            for t in map(normalize_target, targets)}
+
+
+def tight_bbox(fig):
+    """The figure's bbox_inches='tight' box, in inches, padded like savefig pads it"""
+    bbox = fig.get_tightbbox(fig.canvas.get_renderer())
+    return bbox.padded(matplotlib.rcParams['savefig.pad_inches'])
+
+
+def rasterize(fig, bbox, dpi):
+    """Draw fig cropped to bbox at dpi; returns an (h, w, 4) uint8 RGBA array"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format='rgba', dpi=dpi, bbox_inches=bbox, transparent=True)
+    # savefig sized the canvas as int(bbox size * dpi)
+    return np.frombuffer(buf.getvalue(), np.uint8).reshape(-1, int(bbox.width * dpi), 4)
+
+
+def encode_raster(rgba, target, dpi):
+    """Encode an RGBA array as the target's PNG or WebP"""
+    image = Image.fromarray(rgba)
+    if target['colors']:
+        # Keeps the transparent background: the octree quantizer handles alpha
+        image = image.quantize(target['colors'], method=Image.Quantize.FASTOCTREE)
+    buf = io.BytesIO()
+    if target['format'] == 'png':
+        image.save(buf, format='PNG', compress_level=target['compress_level'], dpi=(dpi, dpi))
+    else:
+        image.save(buf, format='WEBP', quality=target['quality'], lossless=target['lossless'])
+    return buf.getvalue()
+
+
+def render_targets(spec, targets, pool=None, workers=ENCODE_WORKERS):
+    """Render spec once per target and return {target name: encoded bytes}.
+
+    The layout is computed once for all targets. Pass a FigurePool to reuse
+    its figure; workers=1 encodes everything on the calling thread.
+    """
+    spec = normalize_spec(spec)
+    targets = [normalize_target(t) for t in targets]
+    names = [t['name'] for t in targets]
+    if len(set(names)) != len(names):
+        raise ValueError("Export targets need distinct names")
+    n = len(spec['labels'])
+
+    results = {}
+    futures = {}
+    with span('render_targets', chart_type=spec['type'], categories=n, targets=len(targets)), \
+            ThreadPoolExecutor(max(1, workers)) as executor:
+        chart = pool.get(spec['type'], n) if pool is not None else ChartFigure(spec['type'], n)
+        chart.update(spec)
+        fig = chart.fig
+        with span('tight_bbox'):
+            bbox = tight_bbox(fig)
+
+        # One rasterization per distinct resolution, in target order
+        by_dpi = {}
+        for target in targets:
+            if target['format'] in RASTER_FORMATS:
+                dpi = target['dpi']
+                if target['width'] is not None:
+                    # Half a pixel over, so int(width * dpi) lands on the width
+                    dpi = (target['width'] + 0.5) / bbox.width
+                by_dpi.setdefault(dpi, []).append(target)
+        for dpi, group in by_dpi.items():
+            with span('rasterize', chart_type=spec['type']):
+                rgba = rasterize(fig, bbox, dpi)
+            for target in group:
+                if workers > 1 and rgba.shape[0] * rgba.shape[1] >= PARALLEL_PIXELS:
+                    futures[target['name']] = executor.submit(encode_raster, rgba, target, dpi)
+                else:
+                    with span('encode', format=target['format']):
+                        results[target['name']] = encode_raster(rgba, target, dpi)
+
+        # Vector output while the big rasters are still encoding
+        for target in targets:
+            if target['format'] in RASTER_FORMATS:
+                continue
+            with span('savefig', format=target['format']):
+                # Imported here because vector.py builds on render.py
+                from vector import render_vector, supports
+                vector_spec = dict(spec, format=target['format'])
+                if spec['renderer'] == 'direct' and supports(vector_spec):
+                    data = render_vector(vector_spec)
+                else:
+                    buf = io.BytesIO()
+                    fig.savefig(buf, format=target['format'], dpi=target['dpi'],
+                                bbox_inches=bbox, transparent=True)
+                    data = buf.getvalue()
+            results[target['name']] = data
+
+        for name, future in futures.items():
+            results[name] = future.result()
+    for target in targets:
+        count('output_bytes', len(results[target['name']]), chart_type=spec['type'],
+              format=target['format'])
+    return {name: results[name] for name in names}
@@ -0,0 +1,338 @@
+"""Direct SVG and PDF output for simple chart exports.
+
+Pie, donut, rose and radial charts are only wedges, sectors and a few text
+labels, so render_vector writes them straight out as vector path data
+instead of going through a matplotlib figure, tight_layout and a
+bbox_inches='tight' save. Colors, edge widths, alphas and label anchors
+come from the same code as render.py (palettes, place_texts), so charts
+match the matplotlib output apart from text: text sizes are estimated
+instead of measured, and PDFs use the built-in Helvetica font instead of
+embedding one. That font only covers Windows-1252 text, so PDFs with other
+characters (e.g. Chinese labels) go through matplotlib instead; see
+supports().
+
+Use it through the export API with renderer='direct':
+
+    svg = render_chart({'type': 'donut', 'labels': labels, 'sizes': sizes,
+                        'format': 'svg', 'renderer': 'direct'})
+"""
+import zlib
+from xml.sax.saxutils import escape
+
+import numpy as np
+from matplotlib.colors import to_hex, to_rgba
+
+from layout import PIE_POINTS_PER_UNIT, POLAR_POINTS_PER_UNIT
+from palette import get_palette
+from render import LABEL_PROPS, PCT_BBOX, PCT_PROPS, TITLE_PROPS, place_texts
+
+FONT_FAMILY = 'DejaVu Sans, Helvetica, Arial, sans-serif'
+
+# Average glyph width and descent of DejaVu Sans, in ems
+CHAR_WIDTH = {False: 0.58, True: 0.66}
+DESCENT = 0.24
+
+# The WinAnsiEncoding of the built-in PDF fonts
+PDF_ENCODING = 'cp1252'
+
+# Same margin as savefig's bbox_inches='tight' (pad_inches=0.1)
+PAD_POINTS = 7.2
+
+# Percentage boxes use boxstyle 'round,pad=0.3': pad and corner radius in ems
+PCT_BOX_PAD = 0.3
+
+
+class Shape:
+    """A filled path; ops are ('M', x, y), ('L', x, y), ('A', cx, cy, r, t0, t1), ('Z',)"""
+
+    def __init__(self, ops, color, alpha=1., edgecolor=None, linewidth=0.):
+        self.ops = ops
+        self.color = color
+        self.alpha = alpha
+        self.edgecolor = edgecolor if linewidth else None
+        self.linewidth = linewidth
+
+
+class Label:
+    """One line of text anchored at (x, y) in points, matplotlib-style ha/va"""
+
+    def __init__(self, x, y, text, fontsize, bold, color, ha='center', va='center', box=None):
+        self.x, self.y = x, y
+        self.text = text
+        self.fontsize = fontsize
+        self.bold = bold
+        self.color = color
+        self.ha, self.va = ha, va
+        self.box = box
+
+    def extent(self):
+        """(x0, y0, x1, y1) of the estimated text box, padding included"""
+        width = len(self.text) * self.fontsize * CHAR_WIDTH[self.bold]
+        height = self.fontsize * 1.2
+        x0 = self.x - width * {'left': 0., 'center': .5, 'right': 1.}[self.ha]
+        y0 = self.y - height * {'bottom': 0., 'baseline': 0., 'center': .5, 'top': 1.}[self.va]
+        pad = self.fontsize * PCT_BOX_PAD if self.box else 0.
+        return x0 - pad, y0 - pad, x0 + width + pad, y0 + height + pad
+
+    def baseline(self):
+        pad = self.fontsize * PCT_BOX_PAD if self.box else 0.
+        x0, y0, _, _ = self.extent()
+        return x0 + pad, y0 + pad + DESCENT * self.fontsize
+
+
+def _on_circle(cx, cy, r, t):
+    return cx + r * np.cos(t), cy + r * np.sin(t)
+
+
+def _sector(r0, r1, t0, t1):
+    """Ops for a wedge (r0 == 0) or ring segment around the origin, angles in radians"""
+    full = abs(t1 - t0) >= 2 * np.pi - 1e-9
+    if full:
+        ops = [('M', r1 * np.cos(t0), r1 * np.sin(t0)), ('A', 0., 0., r1, t0, t1), ('Z',)]
+        if r0 > 0:
+            # Inner circle drawn the other way round cuts the hole
+            ops += [('M', r0 * np.cos(t1), r0 * np.sin(t1)), ('A', 0., 0., r0, t1, t0), ('Z',)]
+        return ops
+    if r0 > 0:
+        return [('M', r1 * np.cos(t0), r1 * np.sin(t0)), ('A', 0., 0., r1, t0, t1),
+                ('L', r0 * np.cos(t1), r0 * np.sin(t1)), ('A', 0., 0., r0, t1, t0), ('Z',)]
+    return [('M', 0., 0.), ('L', r1 * np.cos(t0), r1 * np.sin(t0)),
+            ('A', 0., 0., r1, t0, t1), ('Z',)]
+
+
+def _rounded_rect(x0, y0, x1, y1, r):
+    h = np.pi / 2
+    return [('M', x0 + r, y0), ('L', x1 - r, y0), ('A', x1 - r, y0 + r, r, -h, 0.),
+            ('L', x1, y1 - r), ('A', x1 - r, y1 - r, r, 0., h),
+            ('L', x0 + r, y1), ('A', x0 + r, y1 - r, r, h, 2 * h),
+            ('L', x0, y0 + r), ('A', x0 + r, y0 + r, r, 2 * h, 3 * h), ('Z',)]
+
+
+def _arc_pieces(t0, t1):
+    """Split an arc into pieces of at most 90 degrees"""
+    count = max(1, int(np.ceil(abs(t1 - t0) / (np.pi / 2) - 1e-9)))
+    bounds = np.linspace(t0, t1, count + 1)
+    return zip(bounds[:-1], bounds[1:])
+
+
+def build_scene(spec):
+    """Shapes, labels and the overall (x0, y0, x1, y1) extent, in points, y up"""
+    sizes = np.asarray(spec['sizes'], dtype=float)
+    n = len(sizes)
+    chart_type = spec['type']
+    colors = get_palette(n, spec['custom_colors'], spec['palette']).rgba
+    show_labels, show_percentages = spec['show_labels'], spec['show_percentages']
+    lay, label_xy, pct_xy, label_shown, pct_shown = place_texts(
+        chart_type, sizes, show_labels, show_percentages)
+
+    shapes = []
+    if chart_type in ('pie', 'donut'):
+        scale = PIE_POINTS_PER_UNIT
+        donut = chart_type == 'donut'
+        alpha, inner = (0.95, 0.5) if donut else (0.92, 0.)
+        for t1, t2, color in zip(np.radians(lay['theta1']), np.radians(lay['theta2']), colors):
+            shapes.append(Shape(_sector(inner * scale, scale, t1, t2), color, alpha, '#FAFAFA', 3))
+        if donut:
+            shapes.append(Shape(_sector(0., 0.5 * scale, 0., 2 * np.pi), (1., 1., 1., 1.)))
+        label_pts, pct_pts = label_xy * scale, pct_xy * scale
+        radius, top = scale + 1.5, 1.1 * scale
+    else:
+        scale = POLAR_POINTS_PER_UNIT / lay['ylim']
+        width = 2 * np.pi / n if chart_type == 'rose' else 2 * np.pi / n * 0.7
+        edgecolor = '#FAFAFA' if chart_type == 'rose' else '#FFFFFF'
+        for angle, size, color in zip(lay['angles'], sizes, colors):
+            shapes.append(Shape(_sector(0., size * scale, angle - width / 2, angle + width / 2),
+                                color, 0.92, edgecolor, 2))
+
+        def cartesian(anchors):
+            theta, r = anchors[:, 0], anchors[:, 1] * scale
+            return np.column_stack((r * np.cos(theta), r * np.sin(theta)))
+        label_pts, pct_pts = cartesian(label_xy), cartesian(pct_xy)
+        radius = top = POLAR_POINTS_PER_UNIT
+
+    labels = []
+    pct_labels = []
+    if show_labels:
+        for (x, y), text, ha, va, shown in zip(label_pts, spec['labels'], lay['label_ha'],
+                                               lay['label_va'], label_shown):
+            if shown:
+                labels.append(Label(x, y, text, LABEL_PROPS['fontsize'], False,
+                                    LABEL_PROPS['color'], ha, va))
+    if show_percentages:
+        for (x, y), pct, fontsize, ha, shown in zip(pct_pts, lay['percentages'], lay['pct_fontsize'],
+                                                    lay['pct_ha'], pct_shown):
+            if shown:
+                pct_labels.append(Label(x, y, f'{pct:.1f}%', float(fontsize), True,
+                                        PCT_PROPS['color'], ha, box=PCT_BBOX))
+    # Same draw order as the matplotlib figures
+    texts = labels + pct_labels if chart_type in ('pie', 'donut') else pct_labels + labels
+    if spec['show_title'] and spec['title']:
+        texts.append(Label(0., top + TITLE_PROPS['pad'], spec['title'], TITLE_PROPS['fontsize'],
+                           True, TITLE_PROPS['color'], 'center', 'bottom'))
+
+    extents = np.array([(-radius, -radius, radius, radius)] + [t.extent() for t in texts])
+    x0, y0 = extents[:, :2].min(axis=0) - PAD_POINTS
+    x1, y1 = extents[:, 2:].max(axis=0) + PAD_POINTS
+    return shapes, texts, (x0, y0, x1, y1)
+
+
+def _num(value):
+    return f'{value:.2f}'.rstrip('0').rstrip('.')
+
+
+def _svg_path(ops, x0, y1):
+    # SVG's y axis points down, so y becomes y1 - y
+    d = []
+    for op in ops:
+        if op[0] == 'A':
+            _, cx, cy, r, t0, t1 = op
+            sweep = 0 if t1 > t0 else 1
+            for a, b in _arc_pieces(t0, t1):
+                x, y = _on_circle(cx, cy, r, b)
+                d.append(f'A{_num(r)} {_num(r)} 0 0 {sweep} {_num(x - x0)} {_num(y1 - y)}')
+        elif op[0] == 'Z':
+            d.append('Z')
+        else:
+            d.append(f'{op[0]}{_num(op[1] - x0)} {_num(y1 - op[2])}')
+    return ''.join(d)
+
+
+def _svg_fill(color, alpha):
+    attrs = f'fill="{to_hex(color)}"'
+    opacity = alpha * color[3]
+    if opacity < 1:
+        attrs += f' fill-opacity="{_num(opacity)}"'
+    return attrs
+
+
+def to_svg(shapes, texts, bounds):
+    x0, y0, x1, y1 = bounds
+    width, height = x1 - x0, y1 - y0
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(width)}pt" '
+           f'height="{_num(height)}pt" viewBox="0 0 {_num(width)} {_num(height)}">',
+           f'<g font-family="{FONT_FAMILY}">']
+    for shape in shapes:
+        attrs = _svg_fill(shape.color, shape.alpha)
+        if shape.edgecolor:
+            attrs += (f' stroke="{to_hex(shape.edgecolor)}" stroke-width="{_num(shape.linewidth)}"'
+                      f' stroke-linejoin="miter"')
+            if shape.alpha < 1:
+                attrs += f' stroke-opacity="{_num(shape.alpha)}"'
+        out.append(f'<path d="{_svg_path(shape.ops, x0, y1)}" {attrs}/>')
+    for text in texts:
+        if text.box:
+            bx0, by0, bx1, by1 = text.extent()
+            box = _rounded_rect(bx0, by0, bx1, by1, text.fontsize * PCT_BOX_PAD)
+            out.append(f'<path d="{_svg_path(box, x0, y1)}" '
+                       f'{_svg_fill(to_rgba(text.box["fc"]), text.box["alpha"])}/>')
+        bx, by = text.baseline()
+        weight = ' font-weight="bold"' if text.bold else ''
+        out.append(f'<text x="{_num(bx - x0)}" y="{_num(y1 - by)}" font-size="{_num(text.fontsize)}"'
+                   f'{weight} fill="{to_hex(text.color)}">{escape(text.text)}</text>')
+    out.append('</g></svg>\n')
+    return '\n'.join(out).encode('utf-8')
+
+
+def supports(spec):
+    """Whether render_vector can write spec's text as is"""
+    if spec['format'] != 'pdf':
+        return True
+    try:
+        for text in [spec['title'], *spec['labels']]:
+            text.encode(PDF_ENCODING)
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _pdf_string(text):
+    # Raises UnicodeEncodeError rather than writing '?'; see supports()
+    data = text.encode(PDF_ENCODING)
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _pdf_path(ops):
+    out = []
+    for op in ops:
+        if op[0] == 'A':
+            _, cx, cy, r, t0, t1 = op
+            for a, b in _arc_pieces(t0, t1):
+                # Cubic Bezier approximation of a circular arc of at most 90 degrees
+                k = 4 / 3 * np.tan((b - a) / 4)
+                p1 = (cx + r * (np.cos(a) - k * np.sin(a)), cy + r * (np.sin(a) + k * np.cos(a)))
+                p2 = (cx + r * (np.cos(b) + k * np.sin(b)), cy + r * (np.sin(b) - k * np.cos(b)))
+                p3 = _on_circle(cx, cy, r, b)
+                out.append(' '.join(_num(v) for v in (*p1, *p2, *p3)) + ' c')
+        elif op[0] == 'Z':
+            out.append('h')
+        else:
+            out.append(f'{_num(op[1])} {_num(op[2])} {op[0].lower()}')
+    return out
+
+
+def to_pdf(shapes, texts, bounds):
+    x0, y0, x1, y1 = bounds
+    states = {}
+
+    def alpha_state(fill_alpha, stroke_alpha):
+        key = (round(fill_alpha, 4), round(stroke_alpha, 4))
+        if key not in states:
+            states[key] = f'/A{len(states)}'
+        return states[key] + ' gs'
+
+    def rgb(color, op):
+        return ' '.join(_num(c) for c in to_rgba(color)[:3]) + f' {op}'
+
+    content = [f'1 0 0 1 {_num(-x0)} {_num(-y0)} cm', '0 j']
+    for shape in shapes:
+        content.append(alpha_state(shape.alpha * shape.color[3], shape.alpha))
+        content.append(rgb(shape.color, 'rg'))
+        content += _pdf_path(shape.ops)
+        if shape.edgecolor:
+            content += [rgb(shape.edgecolor, 'RG'), f'{_num(shape.linewidth)} w', 'B']
+        else:
+            content.append('f')
+    for text in texts:
+        if text.box:
+            bx0, by0, bx1, by1 = text.extent()
+            fc = to_rgba(text.box['fc'])
+            content += [alpha_state(text.box['alpha'] * fc[3], 1.), rgb(fc, 'rg')]
+            content += _pdf_path(_rounded_rect(bx0, by0, bx1, by1, text.fontsize * PCT_BOX_PAD))
+            content.append('f')
+        bx, by = text.baseline()
+        font = '/F2' if text.bold else '/F1'
+        content += [alpha_state(1., 1.), rgb(text.color, 'rg'),
+                    f'BT {font} {_num(text.fontsize)} Tf {_num(bx)} {_num(by)} Td']
+        content.append(_pdf_string(text.text).decode('latin-1') + ' Tj ET')
+    stream = zlib.compress('\n'.join(content).encode('latin-1'))
+
+    ext_gstate = ' '.join(f'{name} << /ca {_num(fa)} /CA {_num(sa)} >>'
+                          for (fa, sa), name in states.items())
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(x1 - x0)} {_num(y1 - y0)}] '
+         f'/Resources << /Font << /F1 5 0 R /F2 6 0 R >> /ExtGState << {ext_gstate} >> >> '
+         f'/Contents 4 0 R >>').encode('latin-1'),
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_vector(spec):
+    """Render a normalized spec to SVG or PDF bytes without matplotlib figures"""
+    shapes, texts, bounds = build_scene(spec)
+    if spec['format'] == 'pdf':
+        return to_pdf(shapes, texts, bounds)
+    return to_svg(shapes, texts, bounds)